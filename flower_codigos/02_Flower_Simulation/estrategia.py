@@ -1,3 +1,4 @@
+import time
 from typing import Callable, Union
 
 import tensorflow as tf
@@ -15,12 +16,19 @@ from flwr.common import (
     Parameters,
     Scalar,
     ndarrays_to_parameters,
-    parameters_to_ndarrays,
 )
 
 from flwr.server.client_manager import ClientManager
 from flwr.server.client_proxy import ClientProxy
-from flwr.server.strategy.aggregate import aggregate, weighted_loss_avg
+from flwr.server.strategy.aggregate import weighted_loss_avg
+
+# agregação, cadência da avaliação e arquivo de métricas do projeto jeffersonmatheus. Esses módulos só
+# usam numpy e flwr: basta `pip install --no-deps -e jeffersonmatheus` (na raiz do repositório), sem
+# instalar o TensorFlow fixado pelo pyproject.toml de lá
+from jeffersonmatheus.aggregation import aggregate_streaming
+from jeffersonmatheus.metrics import MetricsSink
+from jeffersonmatheus.schedule import EvaluationSchedule
+
 
 class MyStrategy(fl.server.strategy.FedAvg):
     def __init__(self,
@@ -30,6 +38,11 @@ class MyStrategy(fl.server.strategy.FedAvg):
         min_fit_clients=2,
         min_evaluate_clients=2,
         min_available_clients=2,
+        avaliar_a_cada=1,
+        num_rodadas=None,
+        limiar_inclinacao=0.01,
+        arquivo_metricas=None,
+        registros_por_escrita=32,
     ):
         super().__init__(
             fraction_fit=fraction_fit,
@@ -39,6 +52,22 @@ class MyStrategy(fl.server.strategy.FedAvg):
             min_available_clients=min_available_clients
         )
         self.initial_parameters = initial_parameters
+        # cadência da avaliação: a cada `avaliar_a_cada` rodadas e sempre na última (num_rodadas).
+        # Quando a inclinação da acurácia muda mais que `limiar_inclinacao`, avalia em todas as
+        # rodadas pelas próximas `avaliar_a_cada` rodadas (EvaluationSchedule do jeffersonmatheus).
+        self.num_rodadas = num_rodadas
+        self.agenda = EvaluationSchedule(avaliar_a_cada, num_rodadas, limiar_inclinacao)
+        # registros por rodada (um objeto JSON por linha, no formato do metrics-file do
+        # jeffersonmatheus) acrescentados a `arquivo_metricas`. Ficam num buffer e vão para o arquivo
+        # a cada `registros_por_escrita` registros, na última rodada e na saída do processo.
+        # O id da execução (data e hora) separa as execuções no mesmo arquivo.
+        self.metricas = None
+        if arquivo_metricas is not None:
+            self.metricas = MetricsSink(
+                arquivo_metricas, time.strftime("%Y%m%d-%H%M%S"), registros_por_escrita
+            )
+        self.selecionados = []
+        self.inicio_fit = None
 
     def initialize_parameters(self, client_manager):
         """Inicializa os parâmetros do modelo global."""
@@ -60,6 +89,8 @@ class MyStrategy(fl.server.strategy.FedAvg):
         clients = client_manager.sample(
             num_clients=sample_size, min_num_clients=min_num_clients
         )
+        self.selecionados = [client.cid for client in clients]
+        self.inicio_fit = time.perf_counter()
 
         # retorna os parâmetros agregados e informações de configuração
         return [(client, FitIns(parameters, config)) for client in clients]
@@ -69,24 +100,33 @@ class MyStrategy(fl.server.strategy.FedAvg):
 
         # os parâmetros retornados pelos clientes estão em formato hexadecimal.
         # Para que seja possível tratá-los utilizando funções do python,
-        # utilizamos funções built-in do python para convertê-los em arrays.
-        weights_results = [
-            (parameters_to_ndarrays(fit_res.parameters), fit_res.num_examples)
-            for _, fit_res in results
-        ]
-
-        # convertendo os parâmetros para hexadecimal.
+        # convertemos um cliente de cada vez em arrays e já somamos na média,
+        # sem guardar o modelo de todos os clientes ao mesmo tempo.
         parameters_aggregated = ndarrays_to_parameters(
-            aggregate(weights_results))
+            aggregate_streaming(results))
 
         # métricas globais de treinamento.
         metrics_aggregated = {}
+        if self.metricas is not None:
+            self.metricas.record(
+                "fit",
+                server_round,
+                selected=self.selecionados,
+                clients=[client.cid for client, _ in results],
+                num_examples=sum(fit_res.num_examples for _, fit_res in results),
+                round_duration=time.perf_counter() - self.inicio_fit,
+                failures=len(failures),
+            )
 
         return parameters_aggregated, metrics_aggregated
 
     def configure_evaluate(self, server_round, parameters,
                            client_manager):
         """Configura a próxima rodada de avaliação."""
+        # sem clientes a rodada de avaliação é pulada (não aparece no histórico).
+        if not self.agenda.should_evaluate(server_round):
+            return []
+
         config = {}
 
         evaluate_ins = EvaluateIns(parameters, config)
@@ -118,4 +158,11 @@ class MyStrategy(fl.server.strategy.FedAvg):
         # métricas globais de avaliação.
         metrics_aggregated = {'loss': loss_aggregated,
                               'accuracy': sum(acc_aggregated) / sum(examples)}
+        self.agenda.record(server_round, metrics_aggregated['accuracy'])
+        if self.metricas is not None:
+            self.metricas.record("evaluate", server_round, source="distributed",
+                                 num_clients=len(results), **metrics_aggregated)
+            # a última avaliação sempre acontece (should_evaluate): grava o que restou no buffer.
+            if self.num_rodadas is not None and server_round >= self.num_rodadas:
+                self.metricas.close()
         return loss_aggregated, metrics_aggregated
\ No newline at end of file
@@ -1,23 +1,31 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from jeffersonmatheus.metrics import read_metrics
+
 tamanho_fonte = 15
 
+def ler_avaliacoes(arquivo='../metricas_mystrategy.jsonl'):
+	"""Registros de avaliação da última execução gravada no arquivo de métricas."""
+	avaliacoes = read_metrics(arquivo, phase="evaluate")
+	if not avaliacoes:
+		return []
+	return [registro for registro in avaliacoes if registro["run"] == avaliacoes[-1]["run"]]
+
 def plot_acc():
-	dados = []
-	for i in open('../resultados_mystrategy.txt'):
-		acuracia = float(i.split("\t")[2])
-		dados.append(acuracia)
+	# a rodada vem do registro: com avaliação esparsa nem toda rodada aparece
+	avaliacoes = ler_avaliacoes()
+	rodadas = [registro["round"] for registro in avaliacoes]
+	dados = [registro["accuracy"] for registro in avaliacoes]
 	
 	fig = plt.gcf()
 
-	plt.plot(dados, marker='o', color='r', linewidth=3, markersize=10)
+	plt.plot(rodadas, dados, marker='o', color='r', linewidth=3, markersize=10)
 
-	xticks = np.arange(0,10,1)
-	labels = np.arange(1,11,1)
-	plt.xticks(xticks, labels, fontsize=tamanho_fonte)
+	xticks = np.arange(1,11,1)
+	plt.xticks(xticks, fontsize=tamanho_fonte)
 
-	plt.xlim(-0.5,9.5)
+	plt.xlim(0.5,10.5)
 
 	yticks = np.arange(0.91, 1.01, 0.01)
 	plt.yticks(yticks, fontsize=tamanho_fonte)
@@ -32,20 +40,18 @@ def plot_acc():
 	plt.close()
 
 def plot_loss():
-	dados = []
-	for i in open('../resultados_mystrategy.txt'):
-		loss = float(i.split("\t")[1])
-		dados.append(loss)
+	avaliacoes = ler_avaliacoes()
+	rodadas = [registro["round"] for registro in avaliacoes]
+	dados = [registro["loss"] for registro in avaliacoes]
 	
 	fig = plt.gcf()
 
-	plt.plot(dados, marker='o', color='b', linewidth=3, markersize=10)
+	plt.plot(rodadas, dados, marker='o', color='b', linewidth=3, markersize=10)
 
-	xticks = np.arange(0,10,1)
-	labels = np.arange(1,11,1)
-	plt.xticks(xticks, labels, fontsize=tamanho_fonte)
+	xticks = np.arange(1,11,1)
+	plt.xticks(xticks, fontsize=tamanho_fonte)
 
-	plt.xlim(-0.5,9.5)
+	plt.xlim(0.5,10.5)
 
 	# yticks = np.arange(0.91, 1.01, 0.01)
 	plt.yticks(fontsize=tamanho_fonte)
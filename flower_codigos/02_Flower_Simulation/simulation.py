@@ -17,6 +17,8 @@ from estrategia import MyStrategy
 
 NUM_CLIENTS = 2
 NUM_ROUNDS = 10
+AVALIAR_A_CADA = 1  # avalia a cada k rodadas (sempre na última); 1 avalia em todas
+ARQUIVO_METRICAS = 'metricas_mystrategy.jsonl'  # registros por rodada da MyStrategy (JSONL)
 
 # cria modelo
 modelo = Sequential()
@@ -36,7 +38,9 @@ initial_parameters = modelo.get_weights()
 if algorithm == 'fedavg':
     strategy = fl.server.strategy.FedAvg()
 else:
-    strategy = MyStrategy(initial_parameters, 1.0, 1.0, NUM_CLIENTS, NUM_CLIENTS, NUM_CLIENTS)
+    strategy = MyStrategy(initial_parameters, 1.0, 1.0, NUM_CLIENTS, NUM_CLIENTS, NUM_CLIENTS,
+                          avaliar_a_cada=AVALIAR_A_CADA, num_rodadas=NUM_ROUNDS,
+                          arquivo_metricas=ARQUIVO_METRICAS)
 
 history = fl.simulation.start_simulation(
     client_fn        = start_client,
@@ -47,15 +51,3 @@ history = fl.simulation.start_simulation(
 )
 
 print(history)
-
-if algorithm != 'fedavg':
-    result_loss = history.metrics_distributed['loss']
-    result_acc  = history.metrics_distributed['accuracy']
-
-    print(result_acc)
-
-    # Salva os resultados
-    arquivo_log = open('resultados_mystrategy.txt', 'a')
-    for loss, acuracia in zip(result_loss, result_acc):
-        arquivo_log.write(str(loss[0]) + '\t' + str(loss[1]) + '\t' + str(acuracia[1]) + '\n')
-    arquivo_log.close()
\ No newline at end of file
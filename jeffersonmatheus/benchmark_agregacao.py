@@ -0,0 +1,92 @@
+"""Benchmark do pico de memória (RSS) da agregação com 10, 100 e 1000 resultados simulados.
+
+Compara a agregação com lista completa de ndarrays (flwr aggregate, usada antes pelo FedAvg e
+pelo MyStrategy), a aggregate_inplace do flwr e a aggregate_streaming do projeto. Cada medição
+roda num processo novo; o valor reportado é quanto o pico de RSS cresceu durante a agregação,
+descontando a memória dos próprios resultados recebidos.
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+
+import numpy as np
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+
+def _current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return _peak_rss_mb()
+
+
+def _measure(method, shapes, num_results, queue):
+    from flwr.common import Code, FitRes, Status, ndarrays_to_parameters, parameters_to_ndarrays
+    from flwr.server.strategy.aggregate import aggregate, aggregate_inplace
+
+    from jeffersonmatheus.aggregation import aggregate_streaming
+
+    rng = np.random.default_rng(0)
+    results = [
+        (
+            None,
+            FitRes(
+                Status(Code.OK, ""),
+                ndarrays_to_parameters([rng.standard_normal(shape, dtype=np.float32) for shape in shapes]),
+                int(rng.integers(100, 1000)),
+                {},
+            ),
+        )
+        for _ in range(num_results)
+    ]
+
+    baseline = max(_current_rss_mb(), _peak_rss_mb())
+    start = time.perf_counter()
+    if method == "lista (aggregate)":
+        aggregate([(parameters_to_ndarrays(res.parameters), res.num_examples) for _, res in results])
+    elif method == "aggregate_inplace":
+        aggregate_inplace(results)
+    else:
+        aggregate_streaming(results)
+    elapsed = time.perf_counter() - start
+    queue.put((_peak_rss_mb() - baseline, elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-results", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    from jeffersonmatheus.task import load_model
+
+    shapes = [weights.shape for weights in load_model().get_weights()]
+    model_mb = sum(int(np.prod(shape)) for shape in shapes) * 4 / (1024 * 1024)
+    print(f"Modelo CNN: {model_mb:.2f} MB por cliente (float32)")
+
+    context = multiprocessing.get_context("spawn")
+    methods = ["lista (aggregate)", "aggregate_inplace", "streaming"]
+    print(f"{'resultados':<12}" + "".join(f"{method:>26}" for method in methods))
+    print("-" * (12 + 26 * len(methods)))
+    for num_results in args.num_results:
+        row = f"{num_results:<12}"
+        for method in methods:
+            queue = context.Queue()
+            process = context.Process(target=_measure, args=(method, shapes, num_results, queue))
+            process.start()
+            peak_mb, elapsed = queue.get()
+            process.join()
+            row += f"{f'+{peak_mb:.1f} MB / {elapsed:.2f}s':>26}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark dos codecs de atualização: bytes no fio, tempo de codificação/decodificação e erro.
+
+Mede uma atualização real (um epoch sobre dados sintéticos) da CNN do CIFAR-10 (task.load_model) e
+do MLP do MNIST usado em flower_codigos/01_Construcao_Manual. Também estima o tempo de upload de
+cada atualização em links lentos, para dimensionar a implantação gRPC.
+"""
+
+import argparse
+import time
+
+import keras
+import numpy as np
+from flwr.common import ndarrays_to_parameters, parameters_to_ndarrays
+from keras import layers
+
+from jeffersonmatheus.compression import CODECS, get_codec
+from jeffersonmatheus.task import load_model
+
+
+def mnist_mlp():
+    """Mesmo modelo do client.py de 01_Construcao_Manual."""
+    model = keras.Sequential(
+        [
+            keras.Input(shape=(28, 28)),
+            layers.Flatten(),
+            layers.Dense(128, activation="relu"),
+            layers.Dropout(0.2),
+            layers.Dense(10, activation="softmax"),
+        ]
+    )
+    model.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    return model
+
+
+def trained_update(model, input_shape, num_examples, seed=0):
+    """Pesos antes e depois de um epoch sobre dados sintéticos (um fit típico de cliente)."""
+    rng = np.random.default_rng(seed)
+    x = rng.random((num_examples, *input_shape), dtype=np.float32)
+    if input_shape == (32, 32, 3):
+        x = (x * 255).astype(np.uint8)  # a CNN normaliza uint8 na camada Rescaling
+    y = rng.integers(0, 10, size=num_examples)
+    reference = model.get_weights()
+    model.fit(x, y, epochs=1, batch_size=32, verbose=0)
+    return reference, model.get_weights()
+
+
+def wire_bytes(arrays):
+    """Bytes dos tensores serializados como o Flower envia (Parameters.tensors)."""
+    return sum(len(tensor) for tensor in ndarrays_to_parameters(arrays).tensors)
+
+
+def benchmark(codec_name, reference, weights, topk_fraction, repeats):
+    codec = get_codec(codec_name, topk_fraction)
+    if codec is None:
+        return wire_bytes(weights), 0.0, 0.0, 0.0
+
+    encode_times, decode_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        payload, _ = codec.encode(weights, reference)
+        encode_times.append(time.perf_counter() - start)
+        # A decodificação inclui desserializar o que chegou pelo fio, como no DecodingStrategy
+        tensors = ndarrays_to_parameters(payload)
+        start = time.perf_counter()
+        decoded = codec.decode(parameters_to_ndarrays(tensors), reference)
+        decode_times.append(time.perf_counter() - start)
+
+    # Erro relativo ao tamanho da atualização (||pesos decodificados - pesos|| / ||pesos - base||)
+    error = np.sqrt(sum(np.sum((d - w) ** 2) for d, w in zip(decoded, weights)))
+    update_norm = np.sqrt(sum(np.sum((w - r) ** 2) for w, r in zip(weights, reference)))
+    return wire_bytes(payload), np.median(encode_times), np.median(decode_times), error / update_norm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topk-fraction", type=float, default=0.01)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--link-kbps", type=float, nargs="+", default=[256, 1000, 10000])
+    args = parser.parse_args()
+
+    models = {
+        "CNN CIFAR-10 (task.load_model)": (load_model(), (32, 32, 3)),
+        "MLP MNIST (01_Construcao_Manual)": (mnist_mlp(), (28, 28)),
+    }
+    for title, (model, input_shape) in models.items():
+        reference, weights = trained_update(model, input_shape, num_examples=2000)
+        print(f"\n{title}: {sum(w.size for w in weights)} parâmetros")
+        header = f"{'codec':<9} {'bytes':>10} {'razão':>7} {'encode ms':>10} {'decode ms':>10} {'erro rel.':>10}"
+        header += "".join(f" {f'{kbps:g} kbps':>11}" for kbps in args.link_kbps)
+        print(header)
+        print("-" * len(header))
+        dense = None
+        for codec_name in CODECS:
+            size, encode, decode, error = benchmark(
+                codec_name, reference, weights, args.topk_fraction, args.repeats
+            )
+            dense = dense or size
+            row = (
+                f"{codec_name:<9} {size:>10} {dense / size:>6.1f}x {encode * 1000:>10.2f} "
+                f"{decode * 1000:>10.2f} {error:>10.4f}"
+            )
+            # Tempo de upload de uma atualização em cada link
+            row += "".join(f" {size * 8 / (kbps * 1000):>10.2f}s" for kbps in args.link_kbps)
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
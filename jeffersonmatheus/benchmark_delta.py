@@ -0,0 +1,85 @@
+"""Benchmark do envio de deltas (delta-updates) x pesos absolutos na CNN do CIFAR-10.
+
+1. Tamanho do payload de uma atualização real, por codec: bytes no fio, bytes após gzip (como a
+   compressão do gRPC) e erro do modelo reconstruído no servidor, relativo ao tamanho da atualização.
+2. Tempo médio de rodada numa simulação curta, com pesos absolutos e com deltas.
+"""
+
+import argparse
+import zlib
+
+import numpy as np
+from flwr.common import ndarrays_to_parameters, parameters_to_ndarrays
+
+from benchmark_codecs import trained_update
+from benchmark_fedbuff import run_timed
+from jeffersonmatheus.compression import CODECS, get_codec
+from jeffersonmatheus.task import load_model
+
+
+def payload_size(reference, weights, codec_name, delta_updates, topk_fraction):
+    """(bytes no fio, bytes com gzip, erro relativo) de uma atualização, como cliente e servidor fazem."""
+    codec = get_codec(codec_name, topk_fraction)
+    update = [w - r for w, r in zip(weights, reference)] if delta_updates else weights
+    if codec is None:
+        payload = update
+    else:
+        payload, _ = codec.encode(update, None if delta_updates else reference)
+    tensors = ndarrays_to_parameters(payload).tensors
+    wire = sum(len(tensor) for tensor in tensors)
+    gzipped = sum(len(zlib.compress(tensor, 6)) for tensor in tensors)
+
+    received = parameters_to_ndarrays(ndarrays_to_parameters(payload))
+    if codec is not None:
+        received = codec.decode(received, reference, delta=delta_updates)
+    if delta_updates:
+        received = [r + d for r, d in zip(reference, received)]
+    error = np.sqrt(sum(np.sum((a - w) ** 2) for a, w in zip(received, weights)))
+    update_norm = np.sqrt(sum(np.sum((w - r) ** 2) for w, r in zip(weights, reference)))
+    return wire, gzipped, error / update_norm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topk-fraction", type=float, default=0.01)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--local-epochs", type=int, default=1)
+    parser.add_argument("--codecs", nargs="+", default=["none", "int8"], choices=CODECS)
+    parser.add_argument("--skip-simulation", action="store_true")
+    args = parser.parse_args()
+
+    reference, weights = trained_update(load_model(), (32, 32, 3), num_examples=2000)
+    print(f"\nPayload de uma atualização da CNN ({sum(w.size for w in weights)} parâmetros)")
+    print(f"{'codec':<9} {'envio':<9} {'bytes':>9} {'gzip':>9} {'erro rel.':>10}")
+    print("-" * 50)
+    for codec_name in CODECS:
+        for delta_updates in (False, True):
+            wire, gzipped, error = payload_size(
+                reference, weights, codec_name, delta_updates, args.topk_fraction
+            )
+            mode = "delta" if delta_updates else "pesos"
+            print(f"{codec_name:<9} {mode:<9} {wire:>9} {gzipped:>9} {error:>10.4f}")
+
+    if args.skip_simulation:
+        return
+    print(f"\nTempo de rodada ({args.rounds} rodadas, {args.local_epochs} epoch local)")
+    print(f"{'codec':<9} {'envio':<9} {'s/rodada':>9} {'acurácia final':>15}")
+    print("-" * 45)
+    for codec_name in args.codecs:
+        for delta_updates in (False, True):
+            timeline = run_timed(
+                {
+                    "num-server-rounds": args.rounds,
+                    "local-epochs": args.local_epochs,
+                    "update-codec": codec_name,
+                    "delta-updates": delta_updates,
+                }
+            )
+            # Exclui a primeira rodada (aquecimento: carga dos dados e tracing do modelo)
+            round_times = np.diff([elapsed for elapsed, _ in timeline])
+            mode = "delta" if delta_updates else "pesos"
+            print(f"{codec_name:<9} {mode:<9} {np.mean(round_times):>9.2f} {timeline[-1][1]:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark de tempo de parede até a acurácia alvo: FedAvg síncrono x FedBuff (async-buffer-size).
+
+Roda a simulação no próprio processo (run_simulation) com atrasos artificiais por cliente
+(fit-delay cresce com o partition-id) e registra, a cada rodada, o tempo decorrido e a acurácia
+distribuída. No FedAvg a rodada espera o cliente mais lento dos selecionados; no FedBuff cada
+rodada termina quando chegam K atualizações. Os dois avaliam 40% dos clientes por rodada (no
+FedBuff, só os que não estão treinando).
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from flwr.client import ClientApp
+from flwr.common.config import get_fused_config_from_dir
+from flwr.server import ServerApp
+from flwr.simulation import run_simulation
+
+from jeffersonmatheus import client_app, server_app
+from jeffersonmatheus.experiments import with_run_config
+
+NUM_SUPERNODES = 10
+CONCURRENT_CLIENTS = 4  # clients_per_round do server_fn
+
+
+def run_timed(overrides):
+    """Roda uma simulação e retorna [(segundos desde o início, acurácia)] por rodada."""
+    # Valores do pyproject.toml, como no `flwr run`, com as chaves do benchmark sobrescritas
+    # Compara com o FedAvg padrão (mesmos 4 clientes por rodada)
+    run_config = get_fused_config_from_dir(
+        Path(__file__).parent, {"num-cpus": 1, "num-supernodes": NUM_SUPERNODES, "strategy": "fedavg", **overrides}
+    )
+    timeline = []
+    start = None
+
+    def server_fn(context):
+        nonlocal start
+        components = server_app.server_fn(context)
+        strategy = components.server.strategy if components.server else components.strategy
+        aggregate_evaluate = strategy.aggregate_evaluate
+
+        def timed_aggregate_evaluate(server_round, results, failures):
+            loss, metrics = aggregate_evaluate(server_round, results, failures)
+            timeline.append((time.perf_counter() - start, metrics.get("accuracy", 0.0)))
+            return loss, metrics
+
+        strategy.aggregate_evaluate = timed_aggregate_evaluate
+        start = time.perf_counter()
+        return components
+
+    run_simulation(
+        server_app=ServerApp(server_fn=with_run_config(server_fn, run_config)),
+        client_app=ClientApp(client_fn=with_run_config(client_app.client_fn, run_config)),
+        num_supernodes=NUM_SUPERNODES,
+        backend_config={
+            # Recursos suficientes para os clientes simultâneos rodarem ao mesmo tempo
+            "client_resources": {"num_cpus": os.cpu_count() / CONCURRENT_CLIENTS, "num_gpus": 0.0}
+        },
+    )
+    return timeline
+
+
+def run(buffer_size, args):
+    """FedAvg síncrono (buffer_size=0) ou FedBuff com atrasos artificiais por cliente."""
+    return run_timed(
+        {
+            "num-server-rounds": args.rounds,
+            "local-epochs": args.local_epochs,
+            "fit-delay": args.fit_delay,
+            "async-buffer-size": buffer_size,
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--buffer-sizes", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--local-epochs", type=int, default=1)
+    parser.add_argument("--fit-delay", type=float, default=20.0)
+    parser.add_argument("--target-accuracy", type=float, default=0.3)
+    args = parser.parse_args()
+
+    timelines = {"FedAvg (síncrono)": run(0, args)}
+    for buffer_size in args.buffer_sizes:
+        timelines[f"FedBuff K={buffer_size}"] = run(buffer_size, args)
+
+    print(f"\n{'estratégia':<20} {'s/rodada':>9} {'acurácia final':>15} {'tempo até alvo':>15}")
+    print("-" * 62)
+    for name, timeline in timelines.items():
+        total_time, final_accuracy = timeline[-1]
+        reached = [elapsed for elapsed, accuracy in timeline if accuracy >= args.target_accuracy]
+        time_to_target = f"{reached[0]:.1f}s" if reached else "não atingiu"
+        print(
+            f"{name:<20} {total_time / len(timeline):>9.1f} {final_accuracy:>15.4f} {time_to_target:>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
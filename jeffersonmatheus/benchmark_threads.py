@@ -0,0 +1,81 @@
+"""Benchmark da vazão total de uma rodada com vários clientes treinando ao mesmo tempo.
+
+Cada cliente roda num processo próprio (como os atores do Ray) e treina sobre uma partição
+sintética. Compara o TensorFlow com as threads padrão (cada processo usa todos os núcleos)
+com as threads limitadas por configure_threads (núcleos / clientes simultâneos).
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+
+def _train_client(configure, num_threads, num_examples, epochs, batch_size, barrier, queue):
+    # Importa dentro do processo filho para que a configuração de threads venha antes de qualquer op
+    from jeffersonmatheus.task import configure_threads
+
+    if configure:
+        configure_threads(num_threads)
+
+    from benchmark_xla import synthetic_partition
+    from jeffersonmatheus.client_app import FlowerClient
+    from jeffersonmatheus.task import load_model
+
+    model = load_model()
+    client = FlowerClient(model, synthetic_partition(num_examples), epochs, batch_size, verbose=False)
+    weights = model.get_weights()
+    client.fit(weights, {})  # aquecimento (tracing)
+
+    barrier.wait()
+    start = time.perf_counter()
+    _, num_train, _ = client.fit(weights, {})
+    queue.put((start, time.perf_counter(), num_train * epochs))
+
+
+def run_round(num_clients, configure, num_examples, epochs, batch_size):
+    """Treina `num_clients` clientes em paralelo e retorna as amostras/segundo da rodada inteira."""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(num_clients)
+    queue = context.Queue()
+    num_threads = max(1, os.cpu_count() // num_clients)
+    processes = [
+        context.Process(
+            target=_train_client,
+            args=(configure, num_threads, num_examples, epochs, batch_size, barrier, queue),
+        )
+        for _ in range(num_clients)
+    ]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    # A rodada só termina quando o cliente mais lento termina
+    wall_time = max(end for _, end, _ in results) - min(start for start, _, _ in results)
+    return sum(samples for _, _, samples in results) / wall_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--num-examples", type=int, default=2000)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"Núcleos disponíveis: {os.cpu_count()}")
+    print(f"{'clientes':<10} {'threads padrão':>16} {'configure_threads':>19}")
+    print("-" * 47)
+    for num_clients in args.clients:
+        default = run_round(num_clients, False, args.num_examples, args.epochs, args.batch_size)
+        configured = run_round(num_clients, True, args.num_examples, args.epochs, args.batch_size)
+        print(
+            f"{num_clients:<10} {default:>12.1f} a/s {configured:>15.1f} a/s  "
+            f"({configured / default:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
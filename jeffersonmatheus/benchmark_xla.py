@@ -0,0 +1,66 @@
+"""Benchmark de amostras/segundo do FlowerClient.fit no CPU, com e sem XLA (jit-compile)."""
+
+import argparse
+import time
+
+import numpy as np
+
+from jeffersonmatheus.client_app import FlowerClient
+from jeffersonmatheus.task import LOW_MEMORY, load_model
+
+
+def synthetic_partition(num_examples, seed=0):
+    """Partição sintética com o mesmo formato do CIFAR-10 (não precisa baixar o dataset)."""
+    rng = np.random.default_rng(seed)
+    dtype = np.uint8 if LOW_MEMORY else np.float32
+    x = rng.integers(0, 256, size=(num_examples, 32, 32, 3)).astype(dtype)
+    if not LOW_MEMORY:
+        x /= 255.0
+    y = rng.integers(0, 10, size=num_examples)
+    num_train = int(num_examples * 0.8)
+    return x[:num_train], y[:num_train], x[num_train:], y[num_train:]
+
+
+def benchmark(jit_compile, steps_per_execution, data, epochs, batch_size, repeats):
+    """Retorna as amostras/segundo de cada repetição do fit (a primeira chamada serve de aquecimento)."""
+    model = load_model(jit_compile=jit_compile, steps_per_execution=steps_per_execution)
+    client = FlowerClient(model, data, epochs, batch_size, verbose=False)
+    weights = model.get_weights()
+
+    client.fit(weights, {})  # aquecimento: tracing + compilação XLA
+    throughputs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _, num_examples, _ = client.fit(weights, {})
+        throughputs.append(num_examples * epochs / (time.perf_counter() - start))
+    return throughputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-examples", type=int, default=5000)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--steps-per-execution", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    data = synthetic_partition(args.num_examples)
+    print(f"{'jit-compile':<12} {'steps/exec':<11} {'amostras/s':>12} {'desvio':>8}")
+    print("-" * 46)
+    baseline = None
+    for jit_compile in (False, True):
+        for steps_per_execution in args.steps_per_execution:
+            throughputs = benchmark(
+                jit_compile, steps_per_execution, data, args.epochs, args.batch_size, args.repeats
+            )
+            mean = float(np.mean(throughputs))
+            baseline = baseline or mean
+            print(
+                f"{str(jit_compile):<12} {steps_per_execution:<11} {mean:>12.1f} "
+                f"{np.std(throughputs):>8.1f}  ({mean / baseline:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,56 +2,27 @@
 
 import matplotlib.pyplot as plt
 import numpy as np
-import subprocess
 import json
-import os
+import math
+
+from jeffersonmatheus import experiments
+from jeffersonmatheus.schedule import measured
+
+STRATEGY_KEYS = {"FedAvg": "fedavg", "Performance-Based": "performance"}  # run config `strategy`
 
 def run_experiment(strategy_name):
     """Executa o experimento com uma estratégia específica e retorna os resultados."""
-    # Configura a estratégia no arquivo server_app.py
-    with open("jeffersonmatheus/server_app.py", "r") as f:
-        content = f.read()
-    
-    if strategy_name == "FedAvg":
-        new_content = content.replace("USE_PERFORMANCE_BASED = True", "USE_PERFORMANCE_BASED = False")
-    else:  # Performance-Based
-        new_content = content.replace("USE_PERFORMANCE_BASED = False", "USE_PERFORMANCE_BASED = True")
-    
-    with open("jeffersonmatheus/server_app.py", "w") as f:
-        f.write(new_content)
-    
-    # Executa o experimento
-    result_file = f"results_{strategy_name.lower().replace('-', '_')}.txt"
-    with open(result_file, "w") as f:
-        subprocess.run(["flwr", "run"], stdout=f, stderr=f)
-    
-    # Extrai as métricas do arquivo de resultado
-    accuracies = []
-    with open(result_file, "r") as f:
-        content = f.read()
-        
-    # Procura pela seção de métricas no final do arquivo
-    if "'accuracy': [" in content:
-        metrics_section = content.split("'accuracy': [")[1].split("]")[0]
-        # Extrai os pares (round, accuracy)
-        pairs = metrics_section.split("),")
-        for pair in pairs:
-            try:
-                # Extrai apenas o valor da accuracy
-                accuracy = float(pair.split(",")[1].strip())
-                accuracies.append(accuracy)
-            except:
-                continue
-    
-    return accuracies
+    # Simulação no próprio processo, com a estratégia no run config (rodadas do pyproject.toml)
+    history = experiments.run_experiment(strategy=STRATEGY_KEYS[strategy_name])
+    # Com eval-every > 1 nem toda rodada é avaliada: accuracy_curve deixa NaN nas rodadas puladas
+    return experiments.accuracy_curve(history)
 
 def plot_comparison(fedavg_results, performance_results):
     """Plota a comparação entre as estratégias."""
-    rounds = range(1, len(fedavg_results) + 1)
-    
     plt.figure(figsize=(10, 6))
-    plt.plot(rounds, fedavg_results, 'b-', label='FedAvg (Baseline)', linewidth=2)
-    plt.plot(rounds, performance_results, 'r-', label='Performance-Based', linewidth=2)
+    # Só as rodadas avaliadas (eval-every > 1 deixa NaN nas outras)
+    plt.plot(*measured(fedavg_results), 'b-', label='FedAvg (Baseline)', linewidth=2)
+    plt.plot(*measured(performance_results), 'r-', label='Performance-Based', linewidth=2)
     
     plt.xlabel('Rounds')
     plt.ylabel('Accuracy')
@@ -64,6 +35,8 @@ def plot_comparison(fedavg_results, performance_results):
     
     # Adiciona os valores de accuracy em cada ponto
     for i, (acc_fedavg, acc_perf) in enumerate(zip(fedavg_results, performance_results)):
+        if math.isnan(acc_fedavg) or math.isnan(acc_perf):  # Rodada não avaliada
+            continue
         plt.annotate(f'{acc_fedavg:.3f}', 
                     (i+1, acc_fedavg), 
                     textcoords="offset points", 
@@ -112,6 +85,8 @@ def main():
     # Análise adicional
     print("\nAnálise por rodada:")
     for round_num, (acc_fedavg, acc_perf) in enumerate(zip(fedavg_results, performance_results), 1):
+        if math.isnan(acc_fedavg) or math.isnan(acc_perf):  # Rodada não avaliada
+            continue
         diff = ((acc_perf - acc_fedavg) / acc_fedavg * 100)
         print(f"Rodada {round_num:2d}: FedAvg={acc_fedavg:.4f}, Performance={acc_perf:.4f}, Diff={diff:+.2f}%")
 
@@ -0,0 +1,88 @@
+"""Script para comparar clientes com e sem estado persistente do otimizador (persist-optimizer)."""
+
+import matplotlib.pyplot as plt
+import json
+import os
+
+from jeffersonmatheus import experiments
+from jeffersonmatheus.metrics import accuracy_pairs, read_metrics
+
+# Acurácia alvo usada para contar quantas rodadas cada variante precisa
+TARGET_ACCURACY = 0.40
+
+
+def run_experiment(persist_optimizer: bool):
+    """Roda a simulação no próprio processo e retorna os pares (rodada, acurácia) avaliados.
+
+    As acurácias vêm do metrics-file gravado pela estratégia, não do log da simulação.
+    """
+    flag = "true" if persist_optimizer else "false"
+    metrics_file = os.path.abspath(f"metricas_persist_optimizer_{flag}.jsonl")
+    if os.path.exists(metrics_file):
+        os.remove(metrics_file)  # o arquivo é só de acréscimo: começa vazio para esta variante
+    experiments.run_experiment(
+        overrides={"persist-optimizer": persist_optimizer, "metrics-file": metrics_file}
+    )
+    return accuracy_pairs(read_metrics(metrics_file, phase="evaluate"))
+
+
+def rounds_to_target(history, target=TARGET_ACCURACY):
+    """Primeira rodada avaliada em que a acurácia alcança o alvo (None se nunca alcançar)."""
+    for round_num, accuracy in history:
+        if accuracy >= target:
+            return round_num
+    return None
+
+
+def plot_comparison(stateless, persistent):
+    """Plota as curvas de acurácia das duas variantes."""
+    plt.figure(figsize=(10, 6))
+    plt.plot(*zip(*stateless), 'b-o', label='Sem estado (Adam reiniciado)', linewidth=2)
+    plt.plot(*zip(*persistent), 'r-s', label='Estado do Adam persistente', linewidth=2)
+    plt.axhline(TARGET_ACCURACY, color='gray', linestyle='--', label=f'Alvo ({TARGET_ACCURACY:.2f})')
+    plt.xlabel('Rounds')
+    plt.ylabel('Accuracy')
+    plt.title('Estado do otimizador entre rodadas')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig('comparacao_otimizador.png', dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def main():
+    print("Executando experimento sem estado do otimizador...")
+    stateless = run_experiment(persist_optimizer=False)
+
+    print("Executando experimento com estado do otimizador persistente...")
+    persistent = run_experiment(persist_optimizer=True)
+
+    if not stateless or not persistent:
+        print("Erro: nenhuma acurácia registrada nos arquivos de métricas")
+        return
+
+    plot_comparison(stateless, persistent)
+
+    results = {
+        "target_accuracy": TARGET_ACCURACY,
+        "stateless": {
+            "rounds": [round_num for round_num, _ in stateless],
+            "accuracies": [accuracy for _, accuracy in stateless],
+            "rounds_to_target": rounds_to_target(stateless),
+        },
+        "persistent": {
+            "rounds": [round_num for round_num, _ in persistent],
+            "accuracies": [accuracy for _, accuracy in persistent],
+            "rounds_to_target": rounds_to_target(persistent),
+        },
+    }
+    with open("resultados_otimizador.json", "w") as f:
+        json.dump(results, f, indent=4)
+
+    print("\nResultados:")
+    print(f"Sem estado   - Accuracy Final: {stateless[-1][1]:.4f}, rodadas até {TARGET_ACCURACY:.2f}: {rounds_to_target(stateless)}")
+    print(f"Persistente  - Accuracy Final: {persistent[-1][1]:.4f}, rodadas até {TARGET_ACCURACY:.2f}: {rounds_to_target(persistent)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,118 +2,29 @@
 
 import matplotlib.pyplot as plt
 import numpy as np
-import subprocess
 import json
-import os
-import re
+import math
 from typing import Dict, List, Tuple
 
-def get_file_paths():
-    """Detecta automaticamente os caminhos corretos dos arquivos."""
-    # Verifica se estamos no diretório jeffersonmatheus ou no diretório pai
-    if os.path.exists("pyproject.toml"):
-        # Estamos no diretório jeffersonmatheus
-        server_app_path = "jeffersonmatheus/server_app.py"
-        pyproject_path = "pyproject.toml"
-    elif os.path.exists("jeffersonmatheus/pyproject.toml"):
-        # Estamos no diretório pai
-        server_app_path = "jeffersonmatheus/jeffersonmatheus/server_app.py"
-        pyproject_path = "jeffersonmatheus/pyproject.toml"
-    else:
-        raise FileNotFoundError("Não foi possível encontrar os arquivos necessários. Execute o script de dentro do diretório jeffersonmatheus ou do diretório pai.")
-    
-    return server_app_path, pyproject_path
+from jeffersonmatheus import experiments
+from jeffersonmatheus.schedule import measured
 
-def modify_server_config(clients_per_round: int, num_rounds: int = 10):
-    """Modifica a configuração do servidor para usar diferentes quantidades de clientes."""
-    server_app_path, pyproject_path = get_file_paths()
-    
-    with open(server_app_path, "r") as f:
-        content = f.read()
-    
-    # Atualiza o número de clientes por rodada
-    content = re.sub(
-        r'clients_per_round = \d+',
-        f'clients_per_round = {clients_per_round}',
-        content
-    )
-    
-    # Atualiza o fraction_fit baseado no número de clientes
-    fraction_fit = clients_per_round / 10.0  # Assumindo 10 clientes totais
-    content = re.sub(
-        r'fraction_fit=0\.\d+',
-        f'fraction_fit={fraction_fit}',
-        content
-    )
-    
-    with open(server_app_path, "w") as f:
-        f.write(content)
-    
-    # Atualiza o pyproject.toml para o número de rodadas
-    with open(pyproject_path, "r") as f:
-        pyproject_content = f.read()
-    
-    pyproject_content = re.sub(
-        r'num-server-rounds = \d+',
-        f'num-server-rounds = {num_rounds}',
-        pyproject_content
-    )
-    
-    with open(pyproject_path, "w") as f:
-        f.write(pyproject_content)
+STRATEGY_KEYS = {"FedAvg": "fedavg", "Performance-Based": "performance"}  # run config `strategy`
 
 def run_experiment(strategy_name: str, clients_per_round: int, num_rounds: int = 10) -> List[float]:
     """Executa o experimento com uma estratégia específica e retorna os resultados."""
     print(f"  Executando {strategy_name} com {clients_per_round} clientes por rodada...")
     
-    server_app_path, _ = get_file_paths()
-    
-    # Configura a estratégia no arquivo server_app.py
-    with open(server_app_path, "r") as f:
-        content = f.read()
-    
-    if strategy_name == "FedAvg":
-        new_content = content.replace("USE_PERFORMANCE_BASED = True", "USE_PERFORMANCE_BASED = False")
-    else:  # Performance-Based
-        new_content = content.replace("USE_PERFORMANCE_BASED = False", "USE_PERFORMANCE_BASED = True")
-    
-    with open(server_app_path, "w") as f:
-        f.write(new_content)
-    
-    # Executa o experimento
-    result_file = f"results_{strategy_name.lower().replace('-', '_')}_{clients_per_round}clients.txt"
-    with open(result_file, "w") as f:
-        subprocess.run(["flwr", "run"], stdout=f, stderr=f)
-    
-    # Extrai as métricas do arquivo de resultado
-    accuracies = []
-    with open(result_file, "r") as f:
-        content = f.read()
-        
-    # Procura pela seção de métricas no final do arquivo
-    if "'accuracy': [" in content:
-        # Extrai a seção completa de accuracy
-        start_marker = "'accuracy': ["
-        end_marker = "]}"
-        
-        start_idx = content.find(start_marker)
-        if start_idx != -1:
-            start_idx += len(start_marker)
-            end_idx = content.find(end_marker, start_idx)
-            
-            if end_idx != -1:
-                metrics_section = content[start_idx:end_idx]
-                
-                # Extrai os pares (round, accuracy) usando regex mais robusto
-                import re
-                pattern = r'\((\d+),\s*([\d.]+)\)'
-                matches = re.findall(pattern, metrics_section)
-                
-                # Ordena por número da rodada e extrai apenas as accuracies
-                matches.sort(key=lambda x: int(x[0]))
-                accuracies = [float(match[1]) for match in matches]
-                
-                print(f"    Extraídas {len(accuracies)} rodadas: {accuracies}")
+    # Simulação no próprio processo (backend aquecido), com estratégia e clientes por rodada no run config
+    history = experiments.run_experiment(
+        strategy=STRATEGY_KEYS[strategy_name],
+        clients_per_round=clients_per_round,
+        rounds=num_rounds,
+        seed=0,
+    )
+    # Com eval-every > 1 nem toda rodada é avaliada: accuracy_curve deixa NaN nas rodadas puladas
+    accuracies = experiments.accuracy_curve(history, num_rounds)
+    print(f"    Obtidas {len(accuracies)} rodadas: {accuracies}")
     
     return accuracies
 
@@ -130,20 +41,19 @@ def plot_comparison_comprehensive(results: Dict, num_rounds: int):
         col = idx % 2
         ax = axes[row, col]
         
-        rounds = range(1, num_rounds + 1)
-        
         if f'fedavg_{clients}' in results and f'performance_{clients}' in results:
             fedavg_data = results[f'fedavg_{clients}']
             perf_data = results[f'performance_{clients}']
             
-            # Garante que temos dados para todas as rodadas
+            # Garante que temos dados para todas as rodadas (NaN = rodada sem avaliação)
             while len(fedavg_data) < num_rounds:
-                fedavg_data.append(fedavg_data[-1] if fedavg_data else 0.0)
+                fedavg_data.append(math.nan)
             while len(perf_data) < num_rounds:
-                perf_data.append(perf_data[-1] if perf_data else 0.0)
+                perf_data.append(math.nan)
             
-            ax.plot(rounds, fedavg_data[:num_rounds], 'b-', label='FedAvg', linewidth=2)
-            ax.plot(rounds, perf_data[:num_rounds], 'r-', label='Performance-Based', linewidth=2)
+            # Só as rodadas avaliadas (eval-every > 1 deixa NaN nas outras)
+            ax.plot(*measured(fedavg_data[:num_rounds]), 'b-', label='FedAvg', linewidth=2)
+            ax.plot(*measured(perf_data[:num_rounds]), 'r-', label='Performance-Based', linewidth=2)
             
             ax.set_xlabel('Rounds')
             ax.set_ylabel('Accuracy')
@@ -174,9 +84,6 @@ def run_comprehensive_experiment(num_rounds: int = 10):
     for clients_per_round in client_configs:
         print(f"\n--- Testando {clients_per_round} clientes por rodada ---")
         
-        # Modifica configuração do servidor
-        modify_server_config(clients_per_round, num_rounds)
-        
         # Executa FedAvg
         fedavg_results = run_experiment("FedAvg", clients_per_round, num_rounds)
         results[f'fedavg_{clients_per_round}'] = fedavg_results
@@ -0,0 +1,72 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+import numpy as np
+from flwr.common import bytes_to_ndarray
+
+
+def aggregate_streaming(results, release=True):
+    """Média ponderada (FedAvg) dos parâmetros, desserializando um resultado de cada vez.
+
+    Em vez de montar a lista [(parameters_to_ndarrays(...), num_examples), ...] com o modelo de todos
+    os clientes, cada tensor é desserializado, somado (ponderado por num_examples) em acumuladores
+    float64 pré-alocados e descartado. Com `release=True` os bytes de cada resultado também são
+    liberados logo depois de somados. O pico de memória fica O(tamanho do modelo), qualquer que
+    seja o número de clientes na rodada.
+    """
+    sums = []
+    dtypes = []
+    total_examples = 0
+    for _, fit_res in results:
+        num_examples = fit_res.num_examples
+        total_examples += num_examples
+        for i, tensor in enumerate(fit_res.parameters.tensors):
+            layer = bytes_to_ndarray(tensor)
+            if i == len(sums):
+                # Primeiro resultado: aloca os acumuladores com o formato de cada camada
+                sums.append(np.zeros(layer.shape, dtype=np.float64))
+                dtypes.append(layer.dtype)
+            sums[i] += layer * np.float64(num_examples)
+            del layer
+        if release:
+            fit_res.parameters.tensors = []
+
+    for layer_sum in sums:
+        layer_sum /= total_examples
+    return [layer_sum.astype(dtype, copy=False) for layer_sum, dtype in zip(sums, dtypes)]
+
+
+def staleness_weight(staleness, exponent=0.5):
+    """Peso de uma atualização calculada sobre um modelo `staleness` versões atrás: (1 + s) ** -exponent."""
+    return (1.0 + staleness) ** -exponent
+
+
+def aggregate_deltas_streaming(results, bases, weights, release=True):
+    """Média das diferenças (parâmetros do cliente - modelo base que ele recebeu), em streaming.
+
+    `bases[i]` é o modelo (lista de ndarrays) sobre o qual o i-ésimo cliente treinou, ou None se o
+    cliente já enviou o delta (delta-updates), e `weights[i]` multiplica a contribuição dele (ex.:
+    staleness_weight). Retorna
+    sum(weights[i] * num_examples[i] * (x_i - base_i)) / sum(num_examples), em float64. Como em
+    aggregate_streaming, cada tensor é desserializado, somado e descartado em seguida.
+    """
+    sums = []
+    total_examples = 0
+    for (_, fit_res), base, weight in zip(results, bases, weights):
+        num_examples = fit_res.num_examples
+        total_examples += num_examples
+        scale = np.float64(weight * num_examples)
+        for i, tensor in enumerate(fit_res.parameters.tensors):
+            layer = bytes_to_ndarray(tensor)
+            if i == len(sums):
+                # Primeiro resultado: aloca os acumuladores com o formato de cada camada
+                sums.append(np.zeros(layer.shape, dtype=np.float64))
+            if base is not None:
+                layer = layer - base[i]
+            sums[i] += layer * scale
+            del layer
+        if release:
+            fit_res.parameters.tensors = []
+
+    for layer_sum in sums:
+        layer_sum /= total_examples
+    return sums
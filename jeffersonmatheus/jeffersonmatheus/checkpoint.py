@@ -0,0 +1,76 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+CHECKPOINT_PREFIX = "round_"
+
+
+def checkpoint_paths(directory, server_round):
+    """Caminhos (.npz, .json) do checkpoint de uma rodada."""
+    stem = Path(directory) / f"{CHECKPOINT_PREFIX}{server_round:05d}"
+    return stem.with_suffix(".npz"), stem.with_suffix(".json")
+
+
+def save_checkpoint(directory, server_round, parameters, state=None, metadata=None):
+    """Grava o modelo global e o estado da estratégia da rodada em `directory`.
+
+    Os arrays (parâmetros em `param_<i>` e o estado em `state/<nome>`) vão para um .npz sem
+    compressão, e a rodada e os metadados para um JSON ao lado dele. Os dois arquivos são escritos
+    em temporários e renomeados, com o JSON por último: um checkpoint só existe quando o JSON
+    existe, então uma interrupção no meio da escrita nunca deixa um checkpoint pela metade.
+    """
+    os.makedirs(directory, exist_ok=True)
+    arrays_path, sidecar_path = checkpoint_paths(directory, server_round)
+    arrays = {f"param_{i}": layer for i, layer in enumerate(parameters)}
+    arrays.update({f"state/{name}": array for name, array in (state or {}).items()})
+
+    tmp_arrays = arrays_path.with_name(arrays_path.name + ".tmp")
+    with open(tmp_arrays, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_arrays, arrays_path)
+
+    sidecar = {
+        "round": server_round,
+        "num_parameters": len(parameters),
+        "created_at": time.time(),
+        "metadata": metadata or {},
+    }
+    tmp_sidecar = sidecar_path.with_name(sidecar_path.name + ".tmp")
+    with open(tmp_sidecar, "w") as f:
+        json.dump(sidecar, f, indent=2)
+    os.replace(tmp_sidecar, sidecar_path)
+    return sidecar_path
+
+
+def latest_checkpoint(directory):
+    """JSON do checkpoint mais recente em `directory` (None se não houver)."""
+    sidecars = sorted(Path(directory).glob(f"{CHECKPOINT_PREFIX}*.json"))
+    return sidecars[-1] if sidecars else None
+
+
+def load_checkpoint(path):
+    """Lê um checkpoint: (rodada, parâmetros, estado, metadados).
+
+    `path` pode ser o diretório de checkpoints (usa o mais recente), o JSON ou o .npz.
+    """
+    path = Path(path)
+    if path.is_dir():
+        sidecar_path = latest_checkpoint(path)
+        if sidecar_path is None:
+            raise FileNotFoundError(f"nenhum checkpoint em {path}")
+    else:
+        sidecar_path = path.with_suffix(".json")
+    with open(sidecar_path) as f:
+        sidecar = json.load(f)
+
+    with np.load(sidecar_path.with_suffix(".npz")) as arrays:
+        parameters = [arrays[f"param_{i}"] for i in range(sidecar["num_parameters"])]
+        state = {
+            name[len("state/"):]: arrays[name] for name in arrays.files if name.startswith("state/")
+        }
+    return sidecar["round"], parameters, state, sidecar["metadata"]
@@ -1,47 +1,201 @@
 """jeffersonMatheus: A Flower / TensorFlow app."""
 
+import hashlib
+import time
+
+import numpy as np
 from flwr.client import NumPyClient, ClientApp
-from flwr.common import Context
+from flwr.common import ArrayRecord, ConfigRecord, Context
+
+from jeffersonmatheus.compression import get_codec
+from jeffersonmatheus.task import (
+    MODEL_POOL_STATS,
+    configure_threads,
+    get_model,
+    get_optimizer_state,
+    load_data,
+    make_dataset,
+    set_optimizer_state,
+)
+
 
-from jeffersonmatheus.task import load_data, load_model
+INPUT_PIPELINES = ("numpy", "tfdata")
+EVAL_CACHE_SIZE = 8  # Avaliações (por nó) guardadas no cache de avaliação
+
+
+def parameters_digest(parameters):
+    """Hash rápido (blake2b) dos buffers dos parâmetros recebidos do servidor."""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in parameters:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype.str, array.shape)).encode())
+        digest.update(array.data)
+    return digest.hexdigest()
 
 
 # Define Flower Client and client_fn
 class FlowerClient(NumPyClient):
     def __init__(
-        self, model, data, epochs, batch_size, verbose
+        self,
+        model,
+        data,
+        epochs,
+        batch_size,
+        verbose,
+        input_pipeline="numpy",
+        state=None,
+        persist_optimizer=False,
+        eval_cache=False,
+        fit_delay=0.0,
+        codec=None,
+        delta_updates=False,
+        partition_id=None,
     ):
+        if input_pipeline not in INPUT_PIPELINES:
+            raise ValueError(
+                f"input-pipeline inválido: {input_pipeline!r} (use um de {INPUT_PIPELINES})"
+            )
         self.model = model
         self.x_train, self.y_train, self.x_test, self.y_test = data
         self.epochs = epochs
         self.batch_size = batch_size
         self.verbose = verbose
+        self.input_pipeline = input_pipeline
+        # Context.state do nó: guarda o que precisa sobreviver entre as rodadas (otimizador, cache de avaliação)
+        self.state = state
+        self.persist_optimizer = persist_optimizer and state is not None
+        self.eval_cache = eval_cache and state is not None
+        # Atraso artificial (segundos) somado a cada fit, para simular clientes lentos
+        self.fit_delay = fit_delay
+        # Codec das atualizações enviadas no fit (compression.get_codec); None envia os pesos em float32
+        self.codec = codec
+        # Envia (pesos treinados - modelo global recebido) em vez dos pesos
+        self.delta_updates = delta_updates
+        # Identificador estável do cliente (o node_id muda a cada execução); usado ao retomar checkpoints
+        self.partition_id = partition_id
+        if input_pipeline == "tfdata":
+            self.train_ds = make_dataset(self.x_train, self.y_train, batch_size, shuffle=True)
+            self.test_ds = make_dataset(self.x_test, self.y_test, batch_size)
 
     def fit(self, parameters, config):
+        start = time.perf_counter()
         self.model.set_weights(parameters)
-        history = self.model.fit(
-            self.x_train,
-            self.y_train,
-            epochs=self.epochs,
-            batch_size=self.batch_size,
-            verbose=self.verbose,
-        )
+        if self.persist_optimizer and "optimizer" in self.state:
+            set_optimizer_state(self.model, self.state["optimizer"].to_numpy_ndarrays())
+        if self.input_pipeline == "tfdata":
+            history = self.model.fit(
+                self.train_ds, epochs=self.epochs, shuffle=False, verbose=self.verbose
+            )
+        else:
+            history = self.model.fit(
+                self.x_train,
+                self.y_train,
+                epochs=self.epochs,
+                batch_size=self.batch_size,
+                verbose=self.verbose,
+            )
+        if self.persist_optimizer:
+            self.state["optimizer"] = ArrayRecord(get_optimizer_state(self.model))
+        if self.fit_delay > 0:
+            time.sleep(self.fit_delay)
         # Retorna a loss e accuracy do último epoch
-        return self.model.get_weights(), len(self.x_train), {
+        metrics = {
             "loss": float(history.history["loss"][-1]),
-            "accuracy": float(history.history["accuracy"][-1])
+            "accuracy": float(history.history["accuracy"][-1]),
+            "model_pool_reuses": MODEL_POOL_STATS["reuses"],
+            "model_pool_saved_seconds": MODEL_POOL_STATS["saved_seconds"],
+            "num_samples": len(self.x_train) * self.epochs,  # amostras processadas neste fit
         }
+        if self.partition_id is not None:
+            metrics["partition_id"] = self.partition_id
+        weights = self.model.get_weights()
+        reference = parameters
+        if self.delta_updates:
+            weights = [trained - received for trained, received in zip(weights, parameters)]
+            reference = None  # o codec recebe o delta pronto
+        if self.codec is not None:
+            weights = self._encode(weights, reference, metrics)
+        metrics["fit_duration"] = time.perf_counter() - start
+        return weights, len(self.x_train), metrics
+
+    def get_properties(self, config):
+        if self.partition_id is None:
+            return {}
+        return {"partition_id": self.partition_id}
+
+    def _encode(self, weights, reference, metrics):
+        """Codifica os pesos com o codec de atualização; o resíduo (error feedback) fica no Context.state."""
+        start = time.perf_counter()
+        residual = None
+        if self.state is not None and "codec_residual" in self.state:
+            residual = self.state["codec_residual"].to_numpy_ndarrays()
+        payload, residual = self.codec.encode(weights, reference, residual)
+        if residual is not None and self.state is not None:
+            self.state["codec_residual"] = ArrayRecord(residual)
+        metrics["codec"] = self.codec.name
+        metrics["encode_seconds"] = time.perf_counter() - start
+        return payload
 
     def evaluate(self, parameters, config):
+        if self.eval_cache:
+            digest = parameters_digest(parameters)
+            cached = self._cached_evaluation(digest)
+            if cached is not None:
+                loss, accuracy = cached
+                return loss, len(self.x_test), {"accuracy": accuracy, **self._eval_cache_metrics(hit=True)}
+
         self.model.set_weights(parameters)
-        loss, accuracy = self.model.evaluate(self.x_test, self.y_test, verbose=0)
+        if self.input_pipeline == "tfdata":
+            loss, accuracy = self.model.evaluate(self.test_ds, verbose=0)
+        else:
+            loss, accuracy = self.model.evaluate(self.x_test, self.y_test, verbose=0)
         # print(accuracy)
+        if self.eval_cache:
+            self._store_evaluation(digest, loss, accuracy)
+            return loss, len(self.x_test), {"accuracy": accuracy, **self._eval_cache_metrics(hit=False)}
         return loss, len(self.x_test), {"accuracy": accuracy}
 
+    def _cached_evaluation(self, digest):
+        """Procura (loss, accuracy) já calculados para os mesmos parâmetros globais.
+
+        O cache fica no Context.state do nó, que pertence a uma única partição; por isso o hash
+        dos parâmetros basta como chave.
+        """
+        if "eval_cache" not in self.state:
+            self.state["eval_cache"] = ConfigRecord(
+                {"digests": [], "losses": [], "accuracies": [], "hits": 0, "lookups": 0}
+            )
+        cache = self.state["eval_cache"]
+        cache["lookups"] += 1
+        if digest in cache["digests"]:
+            cache["hits"] += 1
+            position = cache["digests"].index(digest)
+            return cache["losses"][position], cache["accuracies"][position]
+        return None
+
+    def _store_evaluation(self, digest, loss, accuracy):
+        cache = self.state["eval_cache"]
+        cache["digests"] = (cache["digests"] + [digest])[-EVAL_CACHE_SIZE:]
+        cache["losses"] = (cache["losses"] + [float(loss)])[-EVAL_CACHE_SIZE:]
+        cache["accuracies"] = (cache["accuracies"] + [float(accuracy)])[-EVAL_CACHE_SIZE:]
+
+    def _eval_cache_metrics(self, hit):
+        cache = self.state["eval_cache"]
+        return {
+            "eval_cache_hit": int(hit),
+            "eval_cache_hit_rate": cache["hits"] / cache["lookups"],
+        }
+
 
 def client_fn(context: Context):
-    # Load model and data
-    net = load_model()
+    # Threads do TensorFlow de acordo com os CPUs do cliente, antes de qualquer operação
+    configure_threads(context.run_config.get("num-cpus", 0))
+
+    # Load model and data (o modelo vem do pool do processo, já compilado)
+    net = get_model(
+        jit_compile=context.run_config.get("jit-compile", False),
+        steps_per_execution=context.run_config.get("steps-per-execution", 1),
+    )
 
     partition_id = context.node_config["partition-id"]
     num_partitions = context.node_config["num-partitions"]
@@ -49,10 +203,28 @@ def client_fn(context: Context):
     epochs = context.run_config["local-epochs"]
     batch_size = context.run_config["batch-size"]
     verbose = context.run_config.get("verbose")
+    input_pipeline = context.run_config.get("input-pipeline", "numpy")
+    # Clientes heterogêneos: o atraso cresce com o partition-id, até fit-delay no último cliente
+    fit_delay = context.run_config.get("fit-delay", 0.0) * (partition_id + 1) / num_partitions
 
     # Return Client instance
     return FlowerClient(
-        net, data, epochs, batch_size, verbose
+        net,
+        data,
+        epochs,
+        batch_size,
+        verbose,
+        input_pipeline,
+        state=context.state,
+        persist_optimizer=context.run_config.get("persist-optimizer", False),
+        eval_cache=context.run_config.get("eval-cache", False),
+        fit_delay=fit_delay,
+        codec=get_codec(
+            context.run_config.get("update-codec", "none"),
+            context.run_config.get("topk-fraction", 0.01),
+        ),
+        delta_updates=context.run_config.get("delta-updates", False),
+        partition_id=partition_id,
     ).to_client()
 
 
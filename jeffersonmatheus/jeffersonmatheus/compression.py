@@ -0,0 +1,104 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+import numpy as np
+
+
+class Float16Codec:
+    """Envia cada tensor em float16 (metade dos bytes do float32)."""
+
+    name = "float16"
+    needs_reference = False
+
+    def encode(self, arrays, reference, residual=None):
+        return [array.astype(np.float16) for array in arrays], None
+
+    def decode(self, payload, reference, delta=False):
+        return [array.astype(np.float32) for array in payload]
+
+
+class Int8Codec:
+    """Quantização linear int8 por tensor: cada tensor vira [q (int8), (mínimo, escala) em float32]."""
+
+    name = "int8"
+    needs_reference = False
+
+    def encode(self, arrays, reference, residual=None):
+        payload = []
+        for array in arrays:
+            minimum = float(array.min()) if array.size else 0.0
+            scale = (float(array.max()) - minimum) / 255.0 if array.size else 0.0
+            if scale == 0.0:
+                scale = 1.0  # tensor constante: q = -128 reconstrói o mínimo
+            quantized = np.rint((array - minimum) / scale) - 128
+            payload.append(quantized.astype(np.int8))
+            payload.append(np.array([minimum, scale], dtype=np.float32))
+        return payload, None
+
+    def decode(self, payload, reference, delta=False):
+        return [
+            ((quantized.astype(np.float32) + 128) * params[1] + params[0]).astype(np.float32)
+            for quantized, params in zip(payload[0::2], payload[1::2])
+        ]
+
+
+class TopKCodec:
+    """Top-k esparso da diferença (pesos treinados - modelo global recebido), com error feedback.
+
+    Cada tensor vira [índices (int32), valores (float32)] dos `fraction` maiores |delta|. O que não
+    foi enviado fica no resíduo do cliente e é somado ao delta da próxima rodada. Com
+    `reference=None` no encode, os arrays já são o delta (delta-updates); com `delta=True` no
+    decode, o resultado é o delta denso e a referência só fornece os formatos.
+    """
+
+    name = "topk"
+    needs_reference = True
+
+    def __init__(self, fraction):
+        if not 0 < fraction <= 1:
+            raise ValueError(f"topk-fraction deve estar em (0, 1], recebido {fraction}")
+        self.fraction = fraction
+
+    def encode(self, arrays, reference, residual=None):
+        payload, new_residual = [], []
+        if reference is None:
+            reference = [None] * len(arrays)
+        for i, (array, base) in enumerate(zip(arrays, reference)):
+            delta = np.array(array, dtype=np.float32) if base is None else array.astype(np.float32) - base
+            delta = delta.ravel()
+            if residual is not None:
+                delta += residual[i].ravel()
+            k = max(1, int(np.ceil(self.fraction * delta.size)))
+            indices = np.argpartition(np.abs(delta), delta.size - k)[delta.size - k:]
+            values = delta[indices]
+            payload.append(indices.astype(np.int32))
+            payload.append(values.astype(np.float32))
+            delta[indices] = 0.0  # o que foi enviado sai do resíduo
+            new_residual.append(delta.reshape(array.shape))
+        return payload, new_residual
+
+    def decode(self, payload, reference, delta=False):
+        decoded = []
+        for base, indices, values in zip(reference, payload[0::2], payload[1::2]):
+            if delta:
+                array = np.zeros(base.shape, dtype=np.float32)
+            else:
+                array = np.array(base, dtype=np.float32, copy=True)
+            array.ravel()[indices] += values
+            decoded.append(array)
+        return decoded
+
+
+CODECS = ("none", "float16", "int8", "topk")
+
+
+def get_codec(name, topk_fraction=0.01):
+    """Codec de atualização pelo nome do run config (`update-codec`); None para "none"."""
+    if name == "none":
+        return None
+    if name == "float16":
+        return Float16Codec()
+    if name == "int8":
+        return Int8Codec()
+    if name == "topk":
+        return TopKCodec(topk_fraction)
+    raise ValueError(f"update-codec inválido: {name!r} (use um de {CODECS})")
@@ -0,0 +1,177 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+from pathlib import Path
+
+import ray
+from flwr.client import ClientApp
+from flwr.common import Context
+from flwr.common.config import get_fused_config_from_dir
+from flwr.server import Server, ServerApp, ServerAppComponents, SimpleClientManager
+from flwr.server.superlink.fleet.vce.backend import supported_backends
+from flwr.server.superlink.fleet.vce.backend.raybackend import RayBackend
+from flwr.simulation import run_simulation
+
+from jeffersonmatheus import client_app, server_app
+from jeffersonmatheus.schedule import fill_rounds
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent  # diretório do pyproject.toml
+NUM_SUPERNODES = 10  # options.num-supernodes da federação local-simulation
+WARM_BACKEND = "ray-warm"
+
+
+class WarmRayBackend(RayBackend):
+    """RayBackend que mantém o Ray e os atores vivos entre simulações do mesmo processo.
+
+    O RayBackend padrão desliga o Ray ao fim de cada run_simulation, então cada execução paga de
+    novo o boot do Ray e, em cada ator, o import do TensorFlow, a compilação do modelo e a carga
+    das partições. Aqui o pool de atores é guardado na classe e reaproveitado enquanto os
+    client_resources forem os mesmos; shutdown_backend() o encerra.
+    """
+
+    _pool = None
+    _pool_resources = None
+
+    def __init__(self, backend_config):
+        self.backend_config = backend_config
+        super().__init__(backend_config)
+
+    def build(self, app_fn):
+        resources = sorted(self.client_resources.items())
+        if WarmRayBackend._pool is not None and WarmRayBackend._pool_resources != resources:
+            shutdown_backend()
+            self.init_ray(self.backend_config)
+        if WarmRayBackend._pool is None:
+            super().build(app_fn)
+            WarmRayBackend._pool = self.pool
+            WarmRayBackend._pool_resources = resources
+        else:
+            self.pool = WarmRayBackend._pool
+            self.app_fn = app_fn
+
+    def terminate(self):
+        # Os atores voltam ao pool ao fim de cada mensagem: nada a fazer até o shutdown_backend()
+        pass
+
+
+supported_backends[WARM_BACKEND] = WarmRayBackend
+
+
+def shutdown_backend():
+    """Encerra os atores e o Ray mantidos pelo WarmRayBackend."""
+    if WarmRayBackend._pool is not None:
+        WarmRayBackend._pool.terminate_all_actors()
+        WarmRayBackend._pool = None
+        WarmRayBackend._pool_resources = None
+    if ray.is_initialized():
+        ray.shutdown()
+
+
+def with_run_config(fn, run_config):
+    """Envolve server_fn/client_fn para usar este run_config (o Context é somente leitura)."""
+
+    def wrapped(context: Context):
+        return fn(
+            Context(
+                run_id=context.run_id,
+                node_id=context.node_id,
+                node_config=context.node_config,
+                state=context.state,
+                run_config=run_config,
+            )
+        )
+
+    return wrapped
+
+
+def effective_run_config(
+    strategy="performance",
+    clients_per_round=4,
+    rounds=None,
+    seed=0,
+    overrides=None,
+    client_cpus=1,
+    num_supernodes=NUM_SUPERNODES,
+):
+    """Run config completo de um experimento: pyproject.toml + parâmetros + `overrides`."""
+    run_config = {
+        "strategy": strategy,
+        "clients-per-round": clients_per_round,
+        "seed": seed,
+        "num-cpus": client_cpus,
+        "num-supernodes": num_supernodes,
+    }
+    if rounds is not None:
+        run_config["num-server-rounds"] = rounds
+    return get_fused_config_from_dir(PROJECT_DIR, {**run_config, **(overrides or {})})
+
+
+def run_experiment(
+    strategy="performance",
+    clients_per_round=4,
+    rounds=None,
+    seed=0,
+    overrides=None,
+    num_supernodes=NUM_SUPERNODES,
+    client_cpus=1,
+    ray_cpus=None,
+):
+    """Roda uma simulação no próprio processo e devolve o History do servidor.
+
+    Os valores do pyproject.toml são combinados com estes parâmetros e com `overrides` (chaves do
+    run config, como no `flwr run --run-config`), sem reescrever nenhum arquivo. As simulações
+    reaproveitam o backend aquecido (WarmRayBackend). Sem `rounds`, vale o num-server-rounds do
+    pyproject.toml; o num-supernodes do run config segue `num_supernodes`. `ray_cpus` limita os
+    CPUs do Ray iniciado por este processo (sem ele, o Ray usa todos os CPUs da máquina); com
+    `client_cpus` por cliente, roda ray_cpus // client_cpus atores.
+    """
+    run_config = effective_run_config(
+        strategy, clients_per_round, rounds, seed, overrides, client_cpus, num_supernodes
+    )
+    histories = []
+
+    def server_fn(context):
+        components = server_app.server_fn(context)
+        # O Server é criado aqui (e não no start_grid) para guardar o History que o fit devolve
+        server = components.server or Server(
+            client_manager=SimpleClientManager(), strategy=components.strategy
+        )
+        fit = server.fit
+
+        def fit_and_keep_history(num_rounds, timeout):
+            history, elapsed = fit(num_rounds, timeout)
+            histories.append(history)
+            # O processo continua vivo entre execuções: grava agora o que ficou no buffer do metrics-file
+            metrics_sink = getattr(server.strategy, "metrics_sink", None)
+            if metrics_sink is not None:
+                metrics_sink.close()
+            return history, elapsed
+
+        server.fit = fit_and_keep_history
+        return ServerAppComponents(server=server, config=components.config)
+
+    backend_config = {"client_resources": {"num_cpus": client_cpus, "num_gpus": 0.0}}
+    if ray_cpus is not None:
+        backend_config["init_args"] = {"num_cpus": ray_cpus}
+    run_simulation(
+        server_app=ServerApp(server_fn=with_run_config(server_fn, run_config)),
+        client_app=ClientApp(client_fn=with_run_config(client_app.client_fn, run_config)),
+        num_supernodes=num_supernodes,
+        backend_name=WARM_BACKEND,
+        backend_config=backend_config,
+    )
+    if not histories:
+        raise RuntimeError(f"a simulação ({strategy}, {clients_per_round} clientes) não terminou")
+    return histories[0]
+
+
+def accuracy_curve(history, num_rounds=None):
+    """Acurácia por rodada (1..num_rounds) do History; rodadas não avaliadas ficam com NaN.
+
+    Usa a avaliação centralizada quando existe (centralized-eval) e a distribuída caso contrário.
+    """
+    pairs = history.metrics_centralized.get("accuracy") or history.metrics_distributed.get(
+        "accuracy", []
+    )
+    # A rodada 0 (modelo inicial, só na avaliação centralizada) fica de fora da curva
+    pairs = [(server_round, value) for server_round, value in pairs if server_round > 0]
+    return fill_rounds(pairs, num_rounds)
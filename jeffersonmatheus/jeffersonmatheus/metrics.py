@@ -0,0 +1,74 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+import atexit
+import json
+import os
+
+
+class MetricsSink:
+    """Arquivo JSONL só de acréscimo com os registros por rodada das estratégias.
+
+    Cada registro é um objeto JSON por linha com `run` (identificador da execução), `round` e
+    `phase`: "run" (configuração da execução), "fit" (clientes selecionados, durações, falhas) ou
+    "evaluate" (loss e acurácia, com `source` "distributed" ou "centralized"). Os registros ficam
+    num buffer em memória e vão para o arquivo a cada `flush_every` registros, no close() e na
+    saída do processo, sempre em modo append: várias execuções podem escrever no mesmo arquivo.
+    """
+
+    def __init__(self, path, run_id, flush_every=32):
+        self.path = path
+        self.run_id = run_id
+        self.flush_every = flush_every
+        self.buffer = []
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atexit.register(self.close)
+
+    def record(self, phase, server_round, **fields):
+        self.buffer.append(
+            json.dumps({"run": self.run_id, "round": server_round, "phase": phase, **fields})
+        )
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        with open(self.path, "a") as f:
+            f.write("\n".join(self.buffer) + "\n")
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.close)
+
+
+def read_metrics(path, run_id=None, phase=None):
+    """Registros do arquivo, em ordem, opcionalmente só de uma execução e/ou de uma fase.
+
+    Lê o arquivo uma linha por vez (O(linhas)); uma última linha incompleta, de uma escrita
+    interrompida, é ignorada.
+    """
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if run_id is not None and record["run"] != run_id:
+                continue
+            if phase is not None and record["phase"] != phase:
+                continue
+            records.append(record)
+    return records
+
+
+def accuracy_pairs(records):
+    """Pares (rodada, acurácia) das avaliações, ordenados pela rodada (rodada 0 fica de fora)."""
+    return sorted(
+        (record["round"], record["accuracy"])
+        for record in records
+        if record["phase"] == "evaluate" and "accuracy" in record and record["round"] > 0
+    )
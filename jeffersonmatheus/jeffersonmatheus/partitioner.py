@@ -0,0 +1,67 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+import numpy as np
+
+
+def _index_dtype(num_values):
+    # Inteiros de 16 bits permitem que o argsort estável use radix sort (O(N))
+    return np.int16 if num_values <= np.iinfo(np.int16).max else np.int32
+
+
+def dirichlet_partition(labels, num_partitions, alpha, seed=None, min_partition_size=0):
+    """Particiona os índices de um dataset com desbalanceamento de rótulos (Dirichlet).
+
+    Mesma ideia do DirichletPartitioner do flwr_datasets, mas vetorizada para milhares de clientes:
+    os rótulos são ordenados uma única vez, as proporções de todas as classes são sorteadas numa
+    única chamada (matriz classes x clientes) e cada classe é cortada nas contagens acumuladas.
+
+    Antes do sorteio, `min_partition_size` exemplos aleatórios são reservados para cada cliente,
+    o que garante o tamanho mínimo sem precisar reamostrar (impraticável com muitos clientes).
+
+    Retorna uma lista com um array int32 de índices por cliente (views de um único buffer).
+    """
+    labels = np.asarray(labels)
+    num_examples = len(labels)
+    if num_partitions * min_partition_size > num_examples:
+        raise ValueError(
+            f"Impossível garantir {min_partition_size} exemplos para {num_partitions} clientes "
+            f"com apenas {num_examples} exemplos."
+        )
+    rng = np.random.default_rng(seed)
+
+    # Embaralha uma vez; a ordenação estável por rótulo preserva a ordem aleatória dentro de cada classe
+    shuffled = rng.permutation(num_examples).astype(np.int32)
+    num_reserved = num_partitions * min_partition_size
+    reserved, remaining = shuffled[:num_reserved], shuffled[num_reserved:]
+
+    classes, class_ids = np.unique(labels[remaining], return_inverse=True)
+    class_ids = class_ids.astype(_index_dtype(len(classes)))
+    by_class = remaining[np.argsort(class_ids, kind="stable")]
+    class_counts = np.bincount(class_ids, minlength=len(classes))
+
+    # Proporções de cada classe entre os clientes, todas num único sorteio
+    proportions = rng.dirichlet(np.full(num_partitions, alpha), size=len(classes))
+    cuts = np.floor(np.cumsum(proportions, axis=1) * class_counts[:, None]).astype(np.int64)
+    cuts[:, -1] = class_counts
+    counts = np.diff(cuts, axis=1, prepend=0)
+
+    # Cliente dono de cada posição de `by_class` (classe a classe, cliente a cliente)
+    owner = np.repeat(
+        np.tile(np.arange(num_partitions, dtype=_index_dtype(num_partitions)), len(classes)),
+        counts.ravel(),
+    )
+    reserved_owner = np.repeat(
+        np.arange(num_partitions, dtype=owner.dtype), min_partition_size
+    )
+    indices = np.concatenate([reserved, by_class])
+    owner = np.concatenate([reserved_owner, owner])
+
+    order = np.argsort(owner, kind="stable")
+    sizes = np.bincount(owner, minlength=num_partitions)
+    return np.split(indices[order], np.cumsum(sizes)[:-1])
+
+
+def iid_partition(num_examples, num_partitions, seed=None):
+    """Particiona os índices de forma IID (tamanhos iguais, ordem aleatória)."""
+    rng = np.random.default_rng(seed)
+    return np.array_split(rng.permutation(num_examples).astype(np.int32), num_partitions)
@@ -0,0 +1,73 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+DEFAULT_STORE_DIR = "resultados_cache"
+# Chaves do run config que só mudam onde/como a execução roda ou é registrada, não o resultado
+IGNORED_KEYS = ("verbose", "metrics-file", "checkpoint-every", "checkpoint-dir", "num-cpus")
+
+
+def code_version():
+    """Hash dos .py do pacote: muda com qualquer edição do código da aplicação."""
+    digest = hashlib.sha256()
+    for path in sorted(PACKAGE_DIR.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ResultStore:
+    """Resultados de experimentos endereçados pelo hash da configuração efetiva.
+
+    A chave de um experimento é o hash do run config completo (pyproject.toml + parâmetros +
+    overrides, menos IGNORED_KEYS), do número de supernodes e da versão do código (code_version()).
+    Dataset, partição (alpha da Dirichlet) e modelo estão em task.py e entram pela versão do código:
+    editar o código invalida os resultados antigos. Cada resultado fica em `<directory>/<chave>.json`,
+    escrito num temporário e renomeado, então uma varredura interrompida só deixa resultados completos.
+    Execuções sem semente (seed = 0) não são reproduzíveis: não têm chave e nunca vão para o cache.
+    """
+
+    def __init__(self, directory=DEFAULT_STORE_DIR):
+        self.directory = Path(directory)
+        self.version = code_version()
+
+    def key(self, run_config, num_supernodes):
+        """Chave do experimento, ou None se ele não tem semente (seed = 0)."""
+        if not run_config.get("seed", 0):
+            return None
+        config = {name: value for name, value in run_config.items() if name not in IGNORED_KEYS}
+        payload = json.dumps(
+            {"config": config, "num_supernodes": num_supernodes, "code_version": self.version},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """Resultado guardado com esta chave (None se ainda não existe ou se a chave é None)."""
+        if key is None:
+            return None
+        path = self.directory / f"{key}.json"
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)["result"]
+
+    def put(self, key, result, run_config=None):
+        if key is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.directory / f"{key}.json"
+        entry = {
+            "key": key,
+            "code_version": self.version,
+            "config": dict(run_config or {}),
+            "result": result,
+        }
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_path, path)
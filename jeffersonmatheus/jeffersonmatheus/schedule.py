@@ -0,0 +1,66 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+import math
+from typing import Optional
+
+
+class EvaluationSchedule:
+    """Decide em quais rodadas a estratégia avalia o modelo global.
+
+    Avalia a cada `every` rodadas e sempre na última. Quando a inclinação da acurácia entre as
+    duas últimas avaliações muda mais que `slope_threshold` (acurácia por rodada), passa a avaliar
+    em todas as rodadas pelas próximas `every` rodadas, para não perder a mudança de regime.
+    Com `every = 1` avalia em todas as rodadas, como antes. Sem `num_rounds`, não força a última.
+    """
+
+    def __init__(self, every: int, num_rounds: Optional[int], slope_threshold: float = 0.01):
+        if every < 1:
+            raise ValueError(f"eval-every deve ser >= 1, recebido {every}")
+        self.every = every
+        self.num_rounds = num_rounds
+        self.slope_threshold = slope_threshold
+        self.history = []  # (rodada, acurácia) das avaliações feitas
+        self.dense_until = 0
+
+    def should_evaluate(self, server_round: int) -> bool:
+        return (
+            server_round % self.every == 0
+            or (self.num_rounds is not None and server_round >= self.num_rounds)
+            or server_round <= self.dense_until
+        )
+
+    def record(self, server_round: int, accuracy: float):
+        """Registra a acurácia de uma avaliação e ativa a janela densa se a inclinação mudou."""
+        self.history.append((server_round, float(accuracy)))
+        if len(self.history) < 3:
+            return
+        (r0, a0), (r1, a1), (r2, a2) = self.history[-3:]
+        if r1 == r0 or r2 == r1:
+            return
+        previous_slope = (a1 - a0) / (r1 - r0)
+        slope = (a2 - a1) / (r2 - r1)
+        if abs(slope - previous_slope) > self.slope_threshold:
+            self.dense_until = server_round + self.every
+
+
+def fill_rounds(pairs, num_rounds=None):
+    """Série densa (rodadas 1..num_rounds) a partir de pares (rodada, valor) possivelmente esparsos.
+
+    As rodadas não avaliadas ficam com NaN: não são medidas e não entram em médias nem gráficos
+    (use measured() ou as funções nan* do NumPy). Sem `num_rounds`, vai até a última rodada avaliada.
+    """
+    if not pairs:
+        return []
+    pairs = {int(server_round): float(value) for server_round, value in pairs}
+    num_rounds = num_rounds or max(pairs)
+    return [pairs.get(server_round, math.nan) for server_round in range(1, num_rounds + 1)]
+
+
+def measured(values):
+    """Rodadas (1..n) e valores de uma série do fill_rounds, sem as rodadas não avaliadas (NaN)."""
+    pairs = [
+        (server_round, value)
+        for server_round, value in enumerate(values, 1)
+        if not math.isnan(value)
+    ]
+    return [server_round for server_round, _ in pairs], [value for _, value in pairs]
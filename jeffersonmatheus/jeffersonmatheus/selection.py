@@ -0,0 +1,180 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+import numpy as np
+
+
+def _top_k(values, k, largest=True):
+    """Posições dos k maiores (ou menores) valores, em ordem; empates ficam na ordem original.
+
+    Equivale a sorted(range(len(values)), key=..., reverse=largest)[:k], mas custa O(n + k log k)
+    graças ao np.partition.
+    """
+    n = len(values)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    keys = -values if largest else values
+    kth = np.partition(keys, k - 1)[k - 1]
+    better = np.flatnonzero(keys < kth)
+    tied = np.flatnonzero(keys == kth)[: k - len(better)]
+    chosen = np.concatenate([better, tied])
+    return chosen[np.lexsort((chosen, keys[chosen]))]
+
+
+class ClientScoreTable:
+    """Tabela indexada com o histórico de performance, o score e o uso de cada cliente.
+
+    O histórico fica num ring buffer pré-alocado (clientes x performance_window, float64) com um
+    vetor de contagens, e os pesos de recência (np.linspace(0.5, 1.0, n) para cada tamanho de
+    histórico n) são pré-calculados. Registrar uma pontuação é O(1) e o score de todos os clientes
+    sai de uma única redução vetorizada, assim como a busca pelos clientes menos usados. A redução
+    percorre o histórico em ordem cronológica, em float64, com as mesmas operações do
+    np.average(historico, weights=pesos): empates entre scores saem iguais aos do cálculo original.
+
+    A tabela também guarda a vazão (amostras/segundo, média móvel exponencial) e as amostras do
+    último fit de cada cliente, para estimar quanto tempo ele levará na próxima rodada.
+    """
+
+    def __init__(self, performance_window, capacity=1024, throughput_smoothing=0.5):
+        self.performance_window = performance_window
+        self.throughput_smoothing = throughput_smoothing  # peso da medição mais recente na média móvel
+        self.index = {}  # cid -> linha da tabela
+        self.cids = []
+        self.history = np.zeros((capacity, performance_window), dtype=np.float64)
+        self.counts = np.zeros(capacity, dtype=np.int64)  # pontuações já registradas (total)
+        self.usage = np.zeros(capacity, dtype=np.int64)
+        self.throughput = np.zeros(capacity, dtype=np.float64)  # amostras/segundo; 0 = ainda não medido
+        self.num_samples = np.zeros(capacity, dtype=np.float64)  # amostras processadas no último fit
+
+        # recency_weights[n, j] = peso da j-ésima pontuação (0 = mais antiga) num histórico de n
+        window = performance_window
+        self.recency_weights = np.zeros((window + 1, window), dtype=np.float64)
+        for size in range(1, window + 1):
+            self.recency_weights[size, :size] = np.linspace(0.5, 1.0, size)
+        self.recency_weight_sums = self.recency_weights.sum(axis=1)
+        self.recency_weight_sums[0] = 1.0  # sem histórico: score 0, sem divisão por zero
+
+    # Arrays com uma linha por cliente (crescem juntos e vão para o checkpoint)
+    STATE_FIELDS = ("history", "counts", "usage", "throughput", "num_samples")
+
+    def __len__(self):
+        return len(self.cids)
+
+    def _grow(self):
+        capacity = 2 * len(self.counts)
+        for name in self.STATE_FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def register(self, cid):
+        """Devolve a linha do cliente, criando-a (score 0, uso 0) se ele ainda não existir."""
+        row = self.index.get(cid)
+        if row is None:
+            row = len(self.cids)
+            if row == len(self.counts):
+                self._grow()
+            self.index[cid] = row
+            self.cids.append(cid)
+        return row
+
+    def rows_state(self, cids):
+        """Linhas dos clientes em `cids` (campo -> array com uma linha por cliente), para o checkpoint."""
+        rows = np.array([self.index[cid] for cid in cids], dtype=np.int64)
+        return {name: getattr(self, name)[rows] for name in self.STATE_FIELDS}
+
+    def restore_row(self, cid, state, position):
+        """Copia a linha `position` de um estado salvo por rows_state para o cliente `cid`."""
+        if state["history"].shape[1] != self.performance_window:
+            raise ValueError(
+                f"checkpoint com performance_window {state['history'].shape[1]}, "
+                f"esperado {self.performance_window}"
+            )
+        row = self.register(cid)
+        for name in self.STATE_FIELDS:
+            getattr(self, name)[row] = state[name][position]
+
+    def record(self, cid, performance_score):
+        """Adiciona uma pontuação ao histórico do cliente e conta mais um uso."""
+        row = self.register(cid)
+        # Sobrescreve a pontuação mais antiga: o buffer guarda só as últimas performance_window
+        self.history[row, self.counts[row] % self.performance_window] = performance_score
+        self.counts[row] += 1
+        self.usage[row] += 1
+
+    def record_duration(self, cid, duration, num_samples):
+        """Atualiza a vazão estimada do cliente com a duração (segundos) e as amostras de um fit."""
+        row = self.register(cid)
+        measured = num_samples / max(duration, 1e-9)
+        previous = self.throughput[row]
+        if previous > 0:
+            measured = self.throughput_smoothing * measured + (1 - self.throughput_smoothing) * previous
+        self.throughput[row] = measured
+        self.num_samples[row] = num_samples
+
+    def expected_durations(self, rows):
+        """Duração estimada do próximo fit de cada cliente (NaN para quem ainda não foi medido)."""
+        throughput = self.throughput[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(throughput > 0, self.num_samples[rows] / throughput, np.nan)
+
+    def history_of(self, row):
+        """Histórico do cliente em ordem cronológica (mais antigo primeiro)."""
+        count = self.counts[row]
+        size = min(count, self.performance_window)
+        slots = np.arange(count - size, count) % self.performance_window
+        return self.history[row, slots].tolist()
+
+    def scores(self, rows=None):
+        """Média ponderada por recência do histórico de cada cliente (0 para quem não tem histórico)."""
+        num_rows = len(self.cids)
+        rows = np.arange(num_rows) if rows is None else np.asarray(rows, dtype=np.int64)
+        window = self.performance_window
+        counts = self.counts[rows]
+        sizes = np.minimum(counts, window)
+        # Histórico em ordem cronológica (mais antigo primeiro), com zeros depois da última pontuação
+        slots = (counts - sizes)[:, None] + np.arange(window)[None, :]
+        chronological = self.history[rows[:, None], slots % window]
+        chronological[np.arange(window)[None, :] >= sizes[:, None]] = 0.0
+        weights = self.recency_weights[sizes]
+        return (chronological * weights).sum(axis=1) / self.recency_weight_sums[sizes]
+
+    def latency_penalties(self, rows, deadline, exponent):
+        """Fator (deadline / duração) ** exponent para quem deve estourar o deadline, como no Oort.
+
+        Clientes dentro do deadline, ou ainda sem duração medida, ficam com fator 1.
+        """
+        durations = self.expected_durations(rows)
+        slow = durations > deadline  # NaN (sem medição) nunca é lento
+        penalties = np.ones(len(rows), dtype=np.float64)
+        penalties[slow] = (deadline / durations[slow]) ** exponent
+        return penalties
+
+    def select(self, available_cids, num_score, num_explore, deadline=0.0, latency_exponent=2.0):
+        """Seleciona `num_explore` clientes entre os menos usados e `num_score` pelo maior score.
+
+        Entre os menos usados, ficam os de menor score. Empates seguem a ordem dos clientes.
+        Com `deadline` > 0 (segundos), o score de quem deve passar do deadline é multiplicado por
+        latency_penalties: a seleção passa a favorecer utilidade por segundo de rodada.
+        """
+        rows = np.fromiter((self.register(cid) for cid in available_cids), dtype=np.int64)
+        scores = self.scores(rows)
+        if deadline > 0:
+            scores = scores * self.latency_penalties(rows, deadline, latency_exponent)
+
+        # Clientes disponíveis com o menor uso até agora
+        explore_positions = np.empty(0, dtype=np.int64)
+        if len(rows):
+            usage = self.usage[rows]
+            least_used = np.flatnonzero(usage == usage.min())
+            # Empates de score ficam na ordem de registro dos clientes
+            least_used = least_used[np.argsort(rows[least_used], kind="stable")]
+            explore_positions = least_used[_top_k(scores[least_used], num_explore, largest=False)]
+
+        remaining = np.ones(len(rows), dtype=bool)
+        remaining[explore_positions] = False
+        remaining_positions = np.flatnonzero(remaining)
+        score_positions = remaining_positions[_top_k(scores[remaining_positions], num_score)]
+        selected = rows[np.concatenate([score_positions, explore_positions])]
+        return [self.cids[row] for row in selected]
@@ -1,18 +1,38 @@
 """jeffersonMatheus: A Flower / TensorFlow app."""
 
+import concurrent.futures
+import math
+import time
 import numpy as np
 import random
-from flwr.common import Context, ndarrays_to_parameters
-from flwr.server import ServerApp, ServerAppComponents, ServerConfig
-from flwr.server.strategy import FedAvg
+from logging import INFO, WARNING
+from flwr.common import (
+    Code,
+    Context,
+    EvaluateIns,
+    FitIns,
+    GetPropertiesIns,
+    ndarrays_to_parameters,
+    parameters_to_ndarrays,
+)
+from flwr.common.logger import log
+from flwr.server import Server, ServerApp, ServerAppComponents, ServerConfig, SimpleClientManager
+from flwr.server.server import fit_client
+from flwr.server.strategy import FedAvg, Strategy
 from typing import List, Tuple, Dict, Optional
 from flwr.common.typing import Parameters, Scalar
 
-from jeffersonmatheus.task import load_model
+from jeffersonmatheus.aggregation import aggregate_deltas_streaming, aggregate_streaming, staleness_weight
+from jeffersonmatheus.checkpoint import load_checkpoint, save_checkpoint
+from jeffersonmatheus.compression import get_codec
+from jeffersonmatheus.metrics import MetricsSink
+from jeffersonmatheus.schedule import EvaluationSchedule
+from jeffersonmatheus.selection import ClientScoreTable
+from jeffersonmatheus.task import load_model, load_test_data, set_seed
 
 
-# ✅ Alternador de estratégia
-USE_PERFORMANCE_BASED = True  # True para usar a estratégia baseada em performance, False para FedAvg padrão
+# ✅ Alternador de estratégia (run config `strategy`)
+STRATEGIES = ("performance", "fedavg")  # Seleção baseada em performance ou FedAvg padrão
 
 
 # ✅ Função de agregação de acurácia
@@ -20,17 +40,202 @@ def aggregate_accuracy(results):
     accuracies = [metrics["accuracy"] for _, metrics in results if "accuracy" in metrics]
     if not accuracies:
         return {}
-    return {"accuracy": float(sum(accuracies) / len(accuracies))}
+    aggregated = {"accuracy": float(sum(accuracies) / len(accuracies))}
+    # Fração das avaliações da rodada respondidas pelo cache de avaliação dos clientes
+    hits = [metrics["eval_cache_hit"] for _, metrics in results if "eval_cache_hit" in metrics]
+    if hits:
+        aggregated["eval_cache_hit_rate"] = float(sum(hits) / len(hits))
+    return aggregated
+
+
+# ✅ Avaliação centralizada no servidor (substitui a avaliação nos clientes)
+def get_evaluate_fn(batch_size):
+    """evaluate_fn que avalia os parâmetros globais no split de teste completo do CIFAR-10.
+
+    O modelo e o split de teste são carregados uma única vez, na primeira avaliação, e a avaliação
+    usa batches grandes. Os clientes ficam só com o treino.
+    """
+    model = None
+
+    def evaluate(server_round, parameters, config):
+        nonlocal model
+        if model is None:
+            model = load_model()
+        x_test, y_test = load_test_data()
+        model.set_weights(parameters)
+        loss, accuracy = model.evaluate(x_test, y_test, batch_size=batch_size, verbose=0)
+        return loss, {"accuracy": accuracy}
+
+    return evaluate
+
+
+# ✅ FedAvg com agregação em streaming (memória O(tamanho do modelo), não O(clientes x modelo))
+class StreamingFedAvg(FedAvg):
+    def __init__(
+        self,
+        delta_updates: bool = False,
+        server_momentum: float = 0.0,
+        eval_schedule: Optional[EvaluationSchedule] = None,
+        checkpoint_dir: str = "checkpoints",
+        checkpoint_every: int = 0,
+        metrics_sink: Optional[MetricsSink] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        # Cadência da avaliação (eval-every); None avalia em todas as rodadas
+        self.eval_schedule = eval_schedule
+        # Checkpoint do modelo global e do estado da estratégia a cada checkpoint_every rodadas (0 desliga)
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        # Rodadas já feitas antes do checkpoint retomado: server_round recomeça em 1 após o resume
+        self.round_offset = 0
+        # Registros por rodada (clientes, durações, loss, acurácia) em JSONL (metrics-file)
+        self.metrics_sink = metrics_sink
+        self.selected_cids = []  # clientes enviados ao fit desde o último registro de fit
+        # Com delta_updates os clientes enviam (pesos treinados - modelo global): a média dos deltas
+        # é aplicada à cópia do modelo global da estratégia, sem desserializá-lo a cada rodada
+        self.delta_updates = delta_updates
+        self.server_momentum = server_momentum  # momentum do servidor (FedAvgM), só com delta_updates
+        self.global_model = None
+        self.velocity = None
+
+    def initialize_parameters(self, client_manager):
+        initial_parameters = super().initialize_parameters(client_manager)
+        if self.delta_updates:
+            if initial_parameters is None:
+                raise ValueError("delta-updates precisa de initial_parameters na estratégia")
+            self.global_model = parameters_to_ndarrays(initial_parameters)
+        return initial_parameters
+
+    def apply_delta(self, delta):
+        """Soma a média dos deltas (com momentum, se configurado) à cópia do modelo global."""
+        if self.server_momentum > 0:
+            if self.velocity is None:
+                self.velocity = [np.zeros_like(layer_delta) for layer_delta in delta]
+            self.velocity = [
+                self.server_momentum * velocity + layer_delta
+                for velocity, layer_delta in zip(self.velocity, delta)
+            ]
+            delta = self.velocity
+        self.global_model = [
+            (layer + layer_delta).astype(layer.dtype)
+            for layer, layer_delta in zip(self.global_model, delta)
+        ]
+        return self.global_model
+
+    def configure_fit(self, server_round, parameters, client_manager):
+        instructions = super().configure_fit(server_round, parameters, client_manager)
+        self.selected_cids.extend(proxy.cid for proxy, _ in instructions)
+        return instructions
+
+    def aggregate_fit(self, server_round, results, failures):
+        """Média ponderada dos resultados, desserializando um cliente de cada vez."""
+        # Registra a rodada mesmo sem agregação: os selecionados que falharam também aparecem
+        if self.metrics_sink is not None:
+            self.record_fit(server_round, results, failures)
+        if not results:
+            return None, {}
+        # Não agrega se houve falhas e elas não são aceitas
+        if not self.accept_failures and failures:
+            return None, {}
+
+        # Métricas antes da agregação, que libera os parâmetros de cada resultado
+        metrics_aggregated = {}
+        if self.fit_metrics_aggregation_fn:
+            fit_metrics = [(res.num_examples, res.metrics) for _, res in results]
+            metrics_aggregated = self.fit_metrics_aggregation_fn(fit_metrics)
+
+        aggregated = aggregate_streaming(results)
+        if self.delta_updates:
+            aggregated = self.apply_delta(aggregated)
+        global_round = server_round + self.round_offset
+        if self.checkpoint_every > 0 and global_round % self.checkpoint_every == 0:
+            start = time.perf_counter()
+            state, metadata = self.checkpoint_state()
+            save_checkpoint(self.checkpoint_dir, global_round, aggregated, state, metadata)
+            metrics_aggregated["checkpoint_seconds"] = time.perf_counter() - start
+        return ndarrays_to_parameters(aggregated), metrics_aggregated
+
+    def record_fit(self, server_round, results, failures):
+        """Registra no metrics_sink os clientes selecionados, os que responderam e a duração de cada um."""
+        selected, self.selected_cids = self.selected_cids, []
+        durations = {
+            proxy.cid: res.metrics["fit_duration"]
+            for proxy, res in results
+            if res.metrics and "fit_duration" in res.metrics
+        }
+        self.metrics_sink.record(
+            "fit",
+            server_round + self.round_offset,
+            selected=selected,
+            clients=[proxy.cid for proxy, _ in results],
+            num_examples=sum(res.num_examples for _, res in results),
+            durations=durations,
+            failures=len(failures),
+        )
+
+    def checkpoint_state(self):
+        """Arrays e metadados do estado da estratégia que vão para o checkpoint."""
+        state = {}
+        if self.velocity is not None:
+            state.update({f"velocity_{i}": layer for i, layer in enumerate(self.velocity)})
+        return state, {"strategy": type(self).__name__}
+
+    def restore_checkpoint(self, server_round, state, metadata):
+        """Restaura o estado salvo por checkpoint_state; as rodadas seguem a partir de server_round."""
+        self.round_offset = server_round
+        num_layers = sum(1 for name in state if name.startswith("velocity_"))
+        if num_layers:
+            self.velocity = [state[f"velocity_{i}"] for i in range(num_layers)]
+
+    def configure_evaluate(self, server_round, parameters, client_manager):
+        # Sem instruções a rodada de avaliação é pulada e não aparece no History
+        if self.eval_schedule and not self.eval_schedule.should_evaluate(server_round):
+            return []
+        return super().configure_evaluate(server_round, parameters, client_manager)
+
+    def aggregate_evaluate(self, server_round, results, failures):
+        loss, metrics = super().aggregate_evaluate(server_round, results, failures)
+        if self.eval_schedule and "accuracy" in metrics:
+            self.eval_schedule.record(server_round, metrics["accuracy"])
+        if self.metrics_sink is not None and results:
+            self.metrics_sink.record(
+                "evaluate",
+                server_round + self.round_offset,
+                source="distributed",
+                loss=loss,
+                num_clients=len(results),
+                **metrics,
+            )
+        return loss, metrics
+
+    def evaluate(self, server_round, parameters):
+        # Avaliação centralizada (evaluate_fn) segue a mesma cadência
+        if self.eval_schedule and not self.eval_schedule.should_evaluate(server_round):
+            return None
+        evaluation = super().evaluate(server_round, parameters)
+        if evaluation is None:
+            return None
+        loss, metrics = evaluation
+        if self.eval_schedule and "accuracy" in metrics:
+            self.eval_schedule.record(server_round, metrics["accuracy"])
+        if self.metrics_sink is not None:
+            self.metrics_sink.record(
+                "evaluate", server_round + self.round_offset, source="centralized", loss=loss, **metrics
+            )
+        return evaluation
 
 
 # ✅ Estratégia personalizada: Performance-Based Selection
-class PerformanceBasedFedAvg(FedAvg):
+class PerformanceBasedFedAvg(StreamingFedAvg):
     def __init__(
         self,
         total_clients: int,
         clients_per_round: int,
         performance_window: int = 5,  # Mantém histórico das últimas 5 rodadas
         exploration_prob: float = 0.3,  # 30% de chance de exploração inicial (não será mais usada)
+        round_deadline: float = 0.0,  # Segundos; > 0 penaliza clientes que devem estourar o deadline
+        latency_exponent: float = 2.0,  # Força da penalidade (deadline / duração) ** expoente
         **kwargs
     ):
         super().__init__(**kwargs)
@@ -38,19 +243,44 @@ class PerformanceBasedFedAvg(FedAvg):
         self.clients_per_round = clients_per_round
         self.performance_window = performance_window
         self.exploration_prob = exploration_prob
-        self.client_performances = {}
-        self.client_usage = {}  # Novo: histórico de uso de cada cliente
+        self.round_deadline = round_deadline
+        self.latency_exponent = latency_exponent
+        # Tabela indexada: histórico, score e uso de cada cliente
+        self.score_table = ClientScoreTable(performance_window)
         self.round = 0
-        
+        # partition-id de cada cliente (cid -> partição), informado nas métricas do fit
+        self.partition_ids = {}
+        # Estado dos clientes lido do checkpoint, aplicado quando os clientes desta execução aparecem
+        self.restored_clients = None
+
+    @property
+    def client_performances(self):
+        """Histórico de performance por cliente (cid -> últimas pontuações)."""
+        table = self.score_table
+        return {cid: table.history_of(row) for cid, row in table.index.items()}
+
+    @property
+    def client_usage(self):
+        """Quantas vezes cada cliente já foi usado no treino (cid -> usos)."""
+        table = self.score_table
+        return {cid: int(table.usage[row]) for cid, row in table.index.items()}
+
     def aggregate_fit(self, server_round, results, failures):
-        """Agrega os resultados e atualiza o histórico de performance e uso."""
-        self.round = server_round
+        """Agrega os resultados e atualiza o histórico de performance, o uso e a vazão."""
+        self.round = server_round + self.round_offset
         
         # Atualiza o histórico de performance dos clientes
+        durations = []
         for client_proxy, fit_res in results:
-            if client_proxy.cid not in self.client_performances:
-                self.client_performances[client_proxy.cid] = []
             metrics = fit_res.metrics if fit_res.metrics is not None else {}
+            if "partition_id" in metrics:
+                self.partition_ids[client_proxy.cid] = int(metrics["partition_id"])
+            # Vazão medida (amostras/segundo) para estimar a duração do próximo fit
+            if "fit_duration" in metrics and "num_samples" in metrics:
+                self.score_table.record_duration(
+                    client_proxy.cid, metrics["fit_duration"], metrics["num_samples"]
+                )
+                durations.append(metrics["fit_duration"])
             # Score misto: acurácia e loss (mantém inovação)
             performance_score = 1.0
             if "accuracy" in metrics and "loss" in metrics:
@@ -64,93 +294,515 @@ class PerformanceBasedFedAvg(FedAvg):
             # Bônus de recência
             recency_bonus = 0.01 * (self.round / 10)
             performance_score *= (1.0 + recency_bonus)
-            history = self.client_performances[client_proxy.cid]
-            history.append(performance_score)
-            # Mantém apenas as últimas performance_window pontuações
-            if len(history) > self.performance_window:
-                history = history[-self.performance_window:]
-            self.client_performances[client_proxy.cid] = history
-            # Atualiza o uso
-            self.client_usage[client_proxy.cid] = self.client_usage.get(client_proxy.cid, 0) + 1
-        return super().aggregate_fit(server_round, results, failures)
-    
+            # Atualiza o histórico (janela de performance_window) e o uso
+            self.score_table.record(client_proxy.cid, performance_score)
+        parameters_aggregated, metrics_aggregated = super().aggregate_fit(server_round, results, failures)
+        if durations:
+            # A rodada dura o tempo do cliente mais lento
+            metrics_aggregated["round_duration"] = float(max(durations))
+        return parameters_aggregated, metrics_aggregated
+
+    def checkpoint_state(self):
+        """Histórico, score, uso e vazão dos clientes, identificados pelo partition-id."""
+        state, metadata = super().checkpoint_state()
+        cids = [cid for cid in self.partition_ids if cid in self.score_table.index]
+        for name, array in self.score_table.rows_state(cids).items():
+            state[f"clients/{name}"] = array
+        state["clients/partition_id"] = np.array(
+            [self.partition_ids[cid] for cid in cids], dtype=np.int64
+        )
+        metadata["performance_window"] = self.performance_window
+        return state, metadata
+
+    def restore_checkpoint(self, server_round, state, metadata):
+        super().restore_checkpoint(server_round, state, metadata)
+        self.round = server_round
+        if "clients/partition_id" in state:
+            self.restored_clients = {
+                name[len("clients/"):]: array
+                for name, array in state.items()
+                if name.startswith("clients/")
+            }
+
+    def restore_clients(self, clients, server_round):
+        """Associa o estado salvo de cada partição aos clientes desta execução.
+
+        Os node_ids mudam a cada execução, então cada cliente informa seu partition-id por
+        get_properties (uma consulta por cliente, só na primeira rodada após o resume).
+        """
+        state = self.restored_clients
+        self.restored_clients = None
+        positions = {int(partition_id): i for i, partition_id in enumerate(state["partition_id"])}
+        ins = GetPropertiesIns(config={})
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            futures = {
+                cid: executor.submit(proxy.get_properties, ins, None, server_round)
+                for cid, proxy in clients.items()
+            }
+        restored = 0
+        for cid, future in futures.items():
+            if future.exception() is not None:
+                log(WARNING, "Cliente %s não informou o partition-id: %s", cid, future.exception())
+                continue
+            partition_id = future.result().properties.get("partition_id")
+            if partition_id in positions:
+                self.score_table.restore_row(cid, state, positions[partition_id])
+                self.partition_ids[cid] = int(partition_id)
+                restored += 1
+        log(INFO, "Estado de %s de %s clientes restaurado do checkpoint", restored, len(positions))
+
     def configure_fit(self, server_round, parameters, client_manager):
         """
         Seleciona clientes com base no histórico de performance,
         mas garante que pelo menos 1/4 (arredondado para cima) dos selecionados
         sejam os menos utilizados até agora (exploração guiada).
         """
+        config = {}
+        if self.on_fit_config_fn is not None:
+            config = self.on_fit_config_fn(server_round)
+        fit_ins = FitIns(parameters, config)
+
+        # Espera os clientes mínimos, como o FedAvg faz antes de amostrar
+        _, min_num_clients = self.num_fit_clients(client_manager.num_available())
+        client_manager.wait_for(min_num_clients)
         all_clients = client_manager.all()
-        client_scores = {}
-        for cid in all_clients.keys():
-            if cid in self.client_performances and len(self.client_performances[cid]) > 0:
-                weights = np.linspace(0.5, 1.0, len(self.client_performances[cid]))
-                client_scores[cid] = np.average(self.client_performances[cid], weights=weights)
-            else:
-                client_scores[cid] = 0.0
-        # Inicializa uso se necessário
-        for cid in all_clients.keys():
-            if cid not in self.client_usage:
-                self.client_usage[cid] = 0
-        n = self.clients_per_round
+        if self.restored_clients is not None:
+            self.restore_clients(all_clients, server_round)
+
+        n = min(self.clients_per_round, len(all_clients))
         # Proporção de exploração: pelo menos 1 cliente, ou n//4 (arredondado para cima)
-        import math
         n_explorar = max(1, math.ceil(n / 4))
         n_score = n - n_explorar
-        # Seleciona os menos usados
-        min_uso = min(self.client_usage.values())
-        menos_usados = [cid for cid, uso in self.client_usage.items() if uso == min_uso]
-        # Se houver mais "menos usados" do que n_explorar, pega os de menor score entre eles
-        menos_usados_sorted = sorted(menos_usados, key=lambda x: client_scores[x])
-        explorar_cids = menos_usados_sorted[:n_explorar]
-        # Remove os explorados da lista de score
-        restantes = [cid for cid in all_clients.keys() if cid not in explorar_cids]
-        # Ordena pelo score
-        score_sorted = sorted(restantes, key=lambda x: client_scores[x], reverse=True)
-        score_cids = score_sorted[:n_score]
-        # Junta os dois grupos
-        selected_cids = score_cids + explorar_cids
-        # Garante que não seleciona mais do que o necessário (caso de empates)
-        selected_cids = selected_cids[:n]
-        selected_clients = [all_clients[cid] for cid in selected_cids if cid in all_clients]
+        selected_cids = self.score_table.select(
+            all_clients.keys(),
+            n_score,
+            n_explorar,
+            deadline=self.round_deadline,
+            latency_exponent=self.latency_exponent,
+        )
         # Comentários para defesa:
         # - Seleciona a maioria dos clientes pelo score de performance (inovação)
         # - Garante que todos os clientes sejam explorados ao longo das rodadas (justiça)
         # - Evita viés e overfitting em poucos clientes
         # - Não depende de aleatoriedade pura
-        return super().configure_fit(server_round, parameters, client_manager)
+        self.selected_cids.extend(selected_cids)
+        return [(all_clients[cid], fit_ins) for cid in selected_cids]
+
+
+# ✅ Estratégia assíncrona com buffer (FedBuff)
+class BufferedAsyncFedAvg(StreamingFedAvg):
+    """FedBuff: agrega assim que chegam `buffer_size` atualizações e reduz o peso das atrasadas.
+
+    Cada agregação gera uma nova versão do modelo global. A estratégia guarda a versão que cada
+    cliente recebeu (client_versions) e o modelo base das versões ainda em treino, para calcular a
+    staleness (quantas versões a atualização está atrasada) e a diferença que cada cliente treinou.
+    O modelo global avança pela média dessas diferenças, ponderadas por staleness_weight.
+    Deve ser usada com o BufferedAsyncServer, que mantém `concurrency` clientes treinando.
+    Cadência da avaliação, checkpoints e metrics-file funcionam como no StreamingFedAvg (com
+    delta_updates os clientes já enviam o delta e o modelo base não é guardado).
+    """
+
+    def __init__(
+        self,
+        buffer_size: int,
+        concurrency: int,
+        staleness_exponent: float = 0.5,
+        server_learning_rate: float = 1.0,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.buffer_size = buffer_size
+        self.concurrency = concurrency
+        self.staleness_exponent = staleness_exponent
+        self.server_learning_rate = server_learning_rate
+        self.model_version = 0
+        self.client_versions = {}  # cid -> versão do modelo global que o cliente recebeu por último
+        self.busy = set()  # clientes treinando ou com atualização ainda não agregada
+        self.base_models = {}  # versão -> ndarrays, só das versões que algum cliente ainda usa
+
+    def configure_fit(self, server_round, parameters, client_manager):
+        """Envia o modelo global atual para clientes ociosos, até `concurrency` clientes ocupados."""
+        if self.global_model is None:
+            self.global_model = parameters_to_ndarrays(parameters)
+        config = {}
+        if self.on_fit_config_fn is not None:
+            config = self.on_fit_config_fn(server_round)
+        config["model_version"] = self.model_version
+        fit_ins = FitIns(parameters, config)
+
+        _, min_num_clients = self.num_fit_clients(client_manager.num_available())
+        client_manager.wait_for(min_num_clients)
+        all_clients = client_manager.all()
+        idle_cids = [cid for cid in all_clients if cid not in self.busy]
+        num_clients = min(self.concurrency - len(self.busy), len(idle_cids))
+        if num_clients <= 0:
+            return []
+
+        self.base_models.setdefault(self.model_version, self.global_model)
+        selected_cids = random.sample(idle_cids, num_clients)
+        for cid in selected_cids:
+            self.client_versions[cid] = self.model_version
+            self.busy.add(cid)
+        self.selected_cids.extend(selected_cids)
+        return [(all_clients[cid], fit_ins) for cid in selected_cids]
+
+    def release(self, cid):
+        """Libera o cliente e descarta os modelos base que nenhum cliente ocupado usa mais."""
+        self.busy.discard(cid)
+        in_use = {self.client_versions[busy_cid] for busy_cid in self.busy}
+        for version in list(self.base_models):
+            if version not in in_use and version != self.model_version:
+                del self.base_models[version]
+
+    def aggregate_fit(self, server_round, results, failures):
+        """Aplica ao modelo global a média das atualizações do buffer, ponderadas pela staleness."""
+        if self.metrics_sink is not None:
+            self.record_fit(server_round, results, failures)
+        if not results or (not self.accept_failures and failures):
+            for client_proxy, _ in results:
+                self.release(client_proxy.cid)
+            return None, {}
+
+        bases, weights, stalenesses = [], [], []
+        for client_proxy, _ in results:
+            version = self.client_versions[client_proxy.cid]
+            staleness = self.model_version - version
+            bases.append(None if self.delta_updates else self.base_models[version])
+            weights.append(staleness_weight(staleness, self.staleness_exponent))
+            stalenesses.append(staleness)
+
+        delta = aggregate_deltas_streaming(results, bases, weights)
+        self.global_model = [
+            (layer + self.server_learning_rate * layer_delta).astype(layer.dtype)
+            for layer, layer_delta in zip(self.global_model, delta)
+        ]
+        self.model_version += 1
+        for client_proxy, _ in results:
+            self.release(client_proxy.cid)
+
+        metrics_aggregated = {
+            "model_version": self.model_version,
+            "staleness_mean": float(np.mean(stalenesses)),
+            "staleness_max": int(max(stalenesses)),
+        }
+        global_round = server_round + self.round_offset
+        if self.checkpoint_every > 0 and global_round % self.checkpoint_every == 0:
+            start = time.perf_counter()
+            state, metadata = self.checkpoint_state()
+            save_checkpoint(self.checkpoint_dir, global_round, self.global_model, state, metadata)
+            metrics_aggregated["checkpoint_seconds"] = time.perf_counter() - start
+        return ndarrays_to_parameters(self.global_model), metrics_aggregated
+
+    def checkpoint_state(self):
+        # Os clientes em treino não entram no checkpoint: após o resume todos começam ociosos
+        state, metadata = super().checkpoint_state()
+        metadata["model_version"] = self.model_version
+        return state, metadata
+
+    def restore_checkpoint(self, server_round, state, metadata):
+        super().restore_checkpoint(server_round, state, metadata)
+        self.model_version = metadata.get("model_version", server_round)
+
+    def configure_evaluate(self, server_round, parameters, client_manager):
+        """Como no FedAvg, mas só com clientes ociosos.
+
+        Um cliente ainda treinando (busy) não avalia ao mesmo tempo: a avaliação esperaria pelo
+        mesmo ator, e a escrita do Context.state de uma mensagem sobrescreveria a da outra.
+        """
+        if self.fraction_evaluate == 0.0:
+            return []
+        if self.eval_schedule and not self.eval_schedule.should_evaluate(server_round):
+            return []
+        config = {}
+        if self.on_evaluate_config_fn is not None:
+            config = self.on_evaluate_config_fn(server_round)
+        evaluate_ins = EvaluateIns(parameters, config)
+
+        sample_size, _ = self.num_evaluation_clients(client_manager.num_available())
+        all_clients = client_manager.all()
+        idle_cids = [cid for cid in all_clients if cid not in self.busy]
+        selected_cids = random.sample(idle_cids, min(sample_size, len(idle_cids)))
+        return [(all_clients[cid], evaluate_ins) for cid in selected_cids]
+
+
+# ✅ Servidor assíncrono para o BufferedAsyncFedAvg
+class BufferedAsyncServer(Server):
+    """Cada rodada termina quando `buffer_size` atualizações chegam, sem esperar o cliente mais lento.
+
+    Os clientes que ainda estão treinando no fim da rodada continuam em segundo plano; as
+    atualizações deles entram no buffer de uma rodada seguinte, com staleness > 0. Sempre que um
+    cliente termina, outro cliente ocioso recebe o modelo global atual.
+    """
+
+    def __init__(self, *, client_manager, strategy: BufferedAsyncFedAvg):
+        super().__init__(client_manager=client_manager, strategy=strategy)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=strategy.concurrency)
+        self.in_flight = {}  # future -> cliente
+
+    def fit_round(self, server_round, timeout):
+        results, failures = [], []
+        while len(results) < self.strategy.buffer_size:
+            if failures and not self.strategy.accept_failures:
+                break
+            # Como no FedAvg, a rodada não espera para sempre: um cliente que sempre falha seria
+            # reatribuído indefinidamente. Agrega o buffer parcial (ou nada, se não há resultados)
+            if len(failures) >= self.strategy.buffer_size:
+                log(
+                    WARNING,
+                    "fit_round %s: %s falhas, agregando %s de %s atualizações",
+                    server_round,
+                    len(failures),
+                    len(results),
+                    self.strategy.buffer_size,
+                )
+                break
+            for client_proxy, fit_ins in self.strategy.configure_fit(
+                server_round, self.parameters, self._client_manager
+            ):
+                future = self.executor.submit(fit_client, client_proxy, fit_ins, timeout, server_round)
+                self.in_flight[future] = client_proxy
+            if not self.in_flight:
+                log(WARNING, "fit_round %s: nenhum cliente disponível para treinar", server_round)
+                return None
+
+            done, _ = concurrent.futures.wait(
+                self.in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                client_proxy = self.in_flight.pop(future)
+                if future.exception() is None and future.result()[1].status.code == Code.OK:
+                    results.append(future.result())
+                else:
+                    failures.append(future.exception() or future.result())
+                    self.strategy.release(client_proxy.cid)
+
+        log(
+            INFO,
+            "aggregate_fit: received %s results and %s failures (%s clients still training)",
+            len(results),
+            len(failures),
+            len(self.in_flight),
+        )
+        parameters_aggregated, metrics_aggregated = self.strategy.aggregate_fit(
+            server_round, results, failures
+        )
+        return parameters_aggregated, metrics_aggregated, (results, failures)
+
+    def fit(self, num_rounds, timeout):
+        history, elapsed = super().fit(num_rounds, timeout)
+        # Espera os clientes que ainda estão treinando; as atualizações deles são descartadas
+        concurrent.futures.wait(self.in_flight)
+        self.in_flight.clear()
+        self.executor.shutdown()
+        return history, elapsed
+
+
+# ✅ Wrapper que decodifica as atualizações comprimidas (update-codec) antes da agregação
+class DecodingStrategy(Strategy):
+    """Decodifica as atualizações dos clientes e repassa resultados densos à estratégia interna.
+
+    Guarda o modelo global enviado a cada cliente (codecs de delta, como o top-k, precisam dele).
+    Com delta_updates os clientes codificam o próprio delta e a estratégia interna recebe deltas;
+    o formato dos tensores vem da cópia do modelo global dela.
+
+    Soma às métricas de fit os bytes recebidos por cliente, os bytes equivalentes em float32 e os
+    tempos médios de codificação (informado pelos clientes) e de decodificação.
+    """
+
+    def __init__(self, strategy: Strategy, codec, delta_updates: bool = False):
+        self.strategy = strategy
+        self.codec = codec
+        self.delta_updates = delta_updates
+        self.client_references = {}  # cid -> ndarrays do modelo global que o cliente recebeu
+
+    def __getattr__(self, name):
+        # Atributos próprios da estratégia interna (ex.: buffer_size e release do FedBuff)
+        if name == "strategy":
+            raise AttributeError(name)
+        return getattr(self.strategy, name)
+
+    def initialize_parameters(self, client_manager):
+        return self.strategy.initialize_parameters(client_manager)
+
+    def configure_fit(self, server_round, parameters, client_manager):
+        instructions = self.strategy.configure_fit(server_round, parameters, client_manager)
+        if self.codec.needs_reference and not self.delta_updates and instructions:
+            reference = parameters_to_ndarrays(parameters)
+            for client_proxy, _ in instructions:
+                self.client_references[client_proxy.cid] = reference
+        return instructions
+
+    def aggregate_fit(self, server_round, results, failures):
+        wire_bytes, dense_bytes, decode_seconds, encode_seconds = 0, 0, 0.0, []
+        for client_proxy, fit_res in results:
+            wire_bytes += sum(len(tensor) for tensor in fit_res.parameters.tensors)
+            start = time.perf_counter()
+            if self.delta_updates:
+                reference = self.strategy.global_model
+            else:
+                reference = self.client_references.pop(client_proxy.cid, None)
+            decoded = self.codec.decode(
+                parameters_to_ndarrays(fit_res.parameters), reference, delta=self.delta_updates
+            )
+            decode_seconds += time.perf_counter() - start
+            fit_res.parameters = ndarrays_to_parameters(decoded)
+            dense_bytes += sum(len(tensor) for tensor in fit_res.parameters.tensors)
+            encode_seconds.append(fit_res.metrics.get("encode_seconds", 0.0))
+
+        parameters_aggregated, metrics_aggregated = self.strategy.aggregate_fit(
+            server_round, results, failures
+        )
+        metrics_aggregated = dict(metrics_aggregated)
+        if results:
+            metrics_aggregated.update(
+                {
+                    "codec_bytes": wire_bytes / len(results),
+                    "dense_bytes": dense_bytes / len(results),
+                    "compression_ratio": dense_bytes / wire_bytes,
+                    "encode_seconds": float(np.mean(encode_seconds)),
+                    "decode_seconds": decode_seconds / len(results),
+                }
+            )
+        return parameters_aggregated, metrics_aggregated
+
+    def configure_evaluate(self, server_round, parameters, client_manager):
+        return self.strategy.configure_evaluate(server_round, parameters, client_manager)
+
+    def aggregate_evaluate(self, server_round, results, failures):
+        return self.strategy.aggregate_evaluate(server_round, results, failures)
+
+    def evaluate(self, server_round, parameters):
+        return self.strategy.evaluate(server_round, parameters)
 
 
 # ✅ Função principal do servidor
 def server_fn(context: Context):
     num_rounds = context.run_config["num-server-rounds"]
-    parameters = ndarrays_to_parameters(load_model().get_weights())
+    strategy_name = context.run_config.get("strategy", "performance")
+    if strategy_name not in STRATEGIES:
+        raise ValueError(f"strategy inválida: {strategy_name!r} (use uma de {STRATEGIES})")
+    # seed > 0 fixa a inicialização do modelo global e a amostragem de clientes do servidor
+    seed = context.run_config.get("seed", 0)
+    if seed:
+        set_seed(seed)
+
+    # resume-from: modelo global e estado da estratégia vêm do checkpoint (diretório ou arquivo)
+    resume_from = context.run_config.get("resume-from", "")
+    checkpoint = None
+    start_round = 0
+    if resume_from:
+        checkpoint = load_checkpoint(resume_from)
+        start_round, weights, _, _ = checkpoint
+        parameters = ndarrays_to_parameters(weights)
+        log(INFO, "Retomando do checkpoint da rodada %s (%s)", start_round, resume_from)
+    else:
+        parameters = ndarrays_to_parameters(load_model().get_weights())
+    # Após o resume só faltam as rodadas seguintes ao checkpoint
+    num_rounds = max(num_rounds - start_round, 0)
 
     # Configurações comuns para todas as estratégias
-    total_clients = 10
-    clients_per_round = 4  # Usando 40% dos clientes por rodada em todas as estratégias
+    total_clients = context.run_config.get("num-supernodes", 10)  # Nós da federação
+    clients_per_round = context.run_config.get("clients-per-round", 4)  # O mesmo em todas as estratégias
+    if not 0 < clients_per_round <= total_clients:
+        raise ValueError(
+            f"clients-per-round={clients_per_round} inválido para num-supernodes={total_clients}"
+        )
+    config = ServerConfig(num_rounds=num_rounds)
+    checkpointing = {
+        "checkpoint_dir": context.run_config.get("checkpoint-dir", "checkpoints"),
+        "checkpoint_every": context.run_config.get("checkpoint-every", 0),
+    }
+    # Codec e formato (pesos ou deltas) das atualizações dos clientes, como no client_fn
+    delta_updates = context.run_config.get("delta-updates", False)
+    codec = get_codec(
+        context.run_config.get("update-codec", "none"),
+        context.run_config.get("topk-fraction", 0.01),
+    )
+
+    # centralized-eval: avalia no servidor (teste completo) e os clientes só treinam
+    centralized_eval = context.run_config.get("centralized-eval", False)
+    evaluate_fn = None
+    if centralized_eval:
+        evaluate_fn = get_evaluate_fn(context.run_config.get("eval-batch-size", 1024))
+    # eval-every > 1: avalia a cada k rodadas, sempre na última e em todas quando a curva muda
+    eval_every = context.run_config.get("eval-every", 1)
+    eval_schedule = None
+    if eval_every > 1:
+        eval_schedule = EvaluationSchedule(
+            eval_every, num_rounds, context.run_config.get("eval-slope-threshold", 0.01)
+        )
 
-    if USE_PERFORMANCE_BASED:
+    # metrics-file: registros por rodada em JSONL, após a configuração da execução
+    metrics_sink = None
+    metrics_file = context.run_config.get("metrics-file", "")
+    if metrics_file:
+        metrics_sink = MetricsSink(metrics_file, context.run_id)
+        metrics_sink.record("run", start_round, config=dict(context.run_config))
+    common = dict(
+        delta_updates=delta_updates,
+        eval_schedule=eval_schedule,
+        **checkpointing,
+        metrics_sink=metrics_sink,
+        min_available_clients=total_clients,
+        initial_parameters=parameters,
+        evaluate_fn=evaluate_fn,
+        evaluate_metrics_aggregation_fn=aggregate_accuracy,
+    )
+
+    # async-buffer-size > 0: FedBuff (cada rodada = uma nova versão do modelo, agregada a cada K atualizações)
+    buffer_size = context.run_config.get("async-buffer-size", 0)
+    server_momentum = context.run_config.get("server-momentum", 0.0)
+    if server_momentum > 0 and not delta_updates and buffer_size == 0:
+        # O StreamingFedAvg só aplica o momentum à média dos deltas
+        log(WARNING, "server-momentum > 0 sem delta-updates: momentum ignorado")
+    if buffer_size > 0:
+        # O FedBuff sorteia os clientes ociosos e aplica os deltas sem momentum
+        if strategy_name != "fedavg":
+            log(
+                WARNING,
+                "async-buffer-size > 0: strategy=%r ignorada (o FedBuff sorteia os clientes)",
+                strategy_name,
+            )
+        if server_momentum > 0:
+            log(WARNING, "async-buffer-size > 0: server-momentum ignorado pelo FedBuff")
+        strategy = BufferedAsyncFedAvg(
+            buffer_size=buffer_size,
+            concurrency=clients_per_round,  # Mesmo número de clientes treinando ao mesmo tempo
+            staleness_exponent=context.run_config.get("staleness-exponent", 0.5),
+            fraction_evaluate=0.0 if centralized_eval else 0.4,  # Como no FedAvg, só clientes ociosos
+            **common,
+        )
+    elif strategy_name == "performance":
         strategy = PerformanceBasedFedAvg(
             total_clients=total_clients,
             clients_per_round=clients_per_round,  # Mesmo número de clientes que o FedAvg
             performance_window=5,
             exploration_prob=0.3,
-            fraction_fit=0.4,
-            min_available_clients=total_clients,
-            initial_parameters=parameters,
-            evaluate_metrics_aggregation_fn=aggregate_accuracy,
+            round_deadline=context.run_config.get("round-deadline", 0.0),
+            latency_exponent=context.run_config.get("latency-exponent", 2.0),
+            server_momentum=server_momentum,
+            fraction_fit=clients_per_round / total_clients,
+            min_fit_clients=clients_per_round,
+            fraction_evaluate=0.0 if centralized_eval else 1.0,
+            **common,
         )
     else:
-        strategy = FedAvg(
-            fraction_fit=0.4,  # 40% dos clientes por rodada
-            fraction_evaluate=0.4,
-            min_available_clients=total_clients,
-            initial_parameters=parameters,
-            evaluate_metrics_aggregation_fn=aggregate_accuracy,
+        strategy = StreamingFedAvg(
+            server_momentum=server_momentum,
+            fraction_fit=clients_per_round / total_clients,  # clients_per_round clientes por rodada
+            min_fit_clients=clients_per_round,  # Nem um a menos pelo arredondamento da fração
+            fraction_evaluate=0.0 if centralized_eval else 0.4,
+            **common,
         )
+    if checkpoint is not None:
+        start_round, _, state, metadata = checkpoint
+        strategy.restore_checkpoint(start_round, state, metadata)
 
-    config = ServerConfig(num_rounds=num_rounds)
+    if codec is not None:
+        strategy = DecodingStrategy(strategy, codec, delta_updates)
+    if buffer_size > 0:
+        server = BufferedAsyncServer(client_manager=SimpleClientManager(), strategy=strategy)
+        return ServerAppComponents(server=server, config=config)
     return ServerAppComponents(strategy=strategy, config=config)
 
 
@@ -0,0 +1,144 @@
+"""jeffersonMatheus: A Flower / TensorFlow app."""
+
+import concurrent.futures
+import contextlib
+import itertools
+import multiprocessing
+import os
+import time
+
+from jeffersonmatheus.task import configure_threads
+
+
+def expand_grid(strategies, clients_per_round, rounds, seeds):
+    """Todas as combinações (strategy x clients_per_round x rounds x seed), na ordem do produto."""
+    return [
+        {"strategy": strategy, "clients_per_round": clients, "rounds": num_rounds, "seed": seed}
+        for strategy, clients, num_rounds, seed in itertools.product(
+            strategies, clients_per_round, rounds, seeds
+        )
+    ]
+
+
+def _init_worker(cpu_budget):
+    # TensorFlow do servidor (avaliação centralizada, modelo inicial) limitado ao orçamento do experimento
+    configure_threads(cpu_budget)
+
+
+def sweep_executor(cpus_per_experiment=2, max_workers=1):
+    """Pool de processos ("spawn") para o run_sweep, que pode ser reaproveitado entre varreduras.
+
+    Cada processo limita o TensorFlow do servidor a `cpus_per_experiment` threads e mantém o Ray
+    aquecido entre os experimentos que roda.
+    """
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(cpus_per_experiment,),
+    )
+
+
+def _run_one(experiment, cpu_budget, client_cpus, overrides):
+    """Roda um experimento da grade num processo do pool; o Ray do processo fica aquecido."""
+    from jeffersonmatheus import experiments
+
+    start = time.perf_counter()
+    history = experiments.run_experiment(
+        **experiment,
+        overrides=overrides,
+        client_cpus=client_cpus,
+        ray_cpus=cpu_budget,
+    )
+    return {
+        **experiment,
+        "accuracies": experiments.accuracy_curve(history, experiment["rounds"]),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def run_sweep(
+    grid,
+    cpus_per_experiment=2,
+    max_concurrent=None,
+    client_cpus=1,
+    overrides=None,
+    on_result=None,
+    store=None,
+    executor=None,
+):
+    """Roda os experimentos da grade em paralelo, num pool de processos, e devolve os resultados.
+
+    Cada processo do pool tem o próprio Ray, limitado a `cpus_per_experiment` CPUs (com
+    `client_cpus` por cliente), e roda um experimento por vez. No máximo `max_concurrent`
+    experimentos rodam ao mesmo tempo; sem ele, cabem os que o número de CPUs da máquina permite.
+    Os processos são criados com "spawn" (TensorFlow e Ray não suportam fork) e reaproveitados entre
+    os experimentos. Cada resultado é o dicionário do experimento com `accuracies` (uma por rodada),
+    `seconds` e `cached`. Eles são entregues a `on_result(resultado, concluídos, total)` assim que
+    terminam (por padrão, uma linha de progresso) e devolvidos na ordem da grade. Com um
+    ResultStore em `store`, os experimentos já guardados nele não rodam de novo e os novos são
+    guardados assim que terminam: uma varredura interrompida continua de onde parou. Com um
+    `executor` (sweep_executor) aberto pelo chamador, os experimentos rodam nele e os processos
+    continuam vivos (e aquecidos) para a próxima varredura; `max_concurrent` é ignorado.
+    """
+    on_result = on_result or print_progress
+    results = [None] * len(grid)
+    pending = list(range(len(grid)))
+    keys = {}
+    configs = {}
+    done = 0
+    if store is not None:
+        from jeffersonmatheus import experiments
+
+        pending = []
+        for i, experiment in enumerate(grid):
+            configs[i] = experiments.effective_run_config(
+                **experiment, overrides=overrides, client_cpus=client_cpus
+            )
+            keys[i] = store.key(configs[i], experiments.NUM_SUPERNODES)
+            cached = store.get(keys[i])
+            if cached is None:
+                pending.append(i)
+                continue
+            results[i] = {**experiment, **cached, "cached": True}
+            done += 1
+            on_result(results[i], done, len(grid))
+    if not pending:
+        return results
+
+    if executor is not None:
+        pool = contextlib.nullcontext(executor)
+    else:
+        if max_concurrent is None:
+            max_concurrent = max(1, (os.cpu_count() or 1) // cpus_per_experiment)
+        pool = sweep_executor(cpus_per_experiment, min(max_concurrent, len(pending)))
+    with pool as executor:
+        futures = {
+            executor.submit(_run_one, grid[i], cpus_per_experiment, client_cpus, overrides): i
+            for i in pending
+        }
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            result = {**future.result(), "cached": False}
+            if store is not None:
+                store.put(
+                    keys[i],
+                    {"accuracies": result["accuracies"], "seconds": result["seconds"]},
+                    configs[i],
+                )
+            results[i] = result
+            done += 1
+            on_result(result, done, len(grid))
+    return results
+
+
+def print_progress(result, done, total):
+    """Linha de progresso de um experimento concluído."""
+    final = f"{result['accuracies'][-1]:.4f}" if result["accuracies"] else "-"
+    elapsed = "cache" if result.get("cached") else f"{result['seconds']:.0f}s"
+    print(
+        f"  [{done}/{total}] {result['strategy']}, {result['clients_per_round']} clientes, "
+        f"{result['rounds']} rodadas, seed {result['seed']}: acurácia final {final} "
+        f"({elapsed})",
+        flush=True,
+    )
@@ -1,23 +1,72 @@
 """jeffersonMatheus: A Flower / TensorFlow app."""
 
+import fcntl
 import os
+import shutil
+import time
 
 import keras
+import numpy as np
+import tensorflow as tf
 from keras import layers
 from flwr_datasets import FederatedDataset
-from flwr_datasets.partitioner import IidPartitioner # (IID = dados independentes e identicamente distribuídos)
-from flwr_datasets.partitioner import DirichletPartitioner # (non-iid) 
+from flwr_datasets.partitioner import IidPartitioner
+
+from jeffersonmatheus.partitioner import dirichlet_partition, iid_partition
 
 
 # Make TensorFlow log less verbose ➡️ Oculta os logs de aviso do TensorFlow (para deixar a saída mais limpa).
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
 
 
-def load_model():
+_THREADS_CONFIGURED = False
+
+
+def _ray_assigned_cpus():
+    # CPUs que o Ray reservou para o ator atual (options.backend.client-resources.num-cpus)
+    try:
+        import ray
+    except ImportError:
+        return None
+    if not ray.is_initialized():
+        return None
+    return ray.get_runtime_context().get_assigned_resources().get("CPU")
+
+
+def configure_threads(num_cpus=None):
+    """Limita as threads do TensorFlow/OpenMP/MKL do processo aos CPUs reservados para o cliente.
+
+    Sem isso, cada ator do Ray usa todos os núcleos da máquina para as operações e, com vários
+    supernodes ao mesmo tempo, os atores disputam o CPU. Precisa ser chamada antes da primeira
+    operação do TensorFlow no processo; chamadas seguintes não fazem nada.
+    """
+    global _THREADS_CONFIGURED
+    if _THREADS_CONFIGURED:
+        return
+    num_cpus = num_cpus or _ray_assigned_cpus()
+    if not num_cpus:
+        return
+    num_threads = max(1, int(num_cpus))
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(num_threads)
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+        # A CNN é sequencial: quase não há operações independentes para paralelizar entre si
+        tf.config.threading.set_inter_op_parallelism_threads(min(2, num_threads))
+    except RuntimeError:
+        # O runtime do TensorFlow já foi inicializado neste processo; mantém a configuração atual
+        return
+    _THREADS_CONFIGURED = True
+
+
+def load_model(jit_compile=False, steps_per_execution=1):
     # Define a simple CNN for CIFAR-10 and set Adam optimizer
+    # No modo LOW_MEMORY as imagens chegam em uint8 e a normalização acontece dentro do modelo (sem pesos extras).
+    preprocessing = [layers.Rescaling(1.0 / 255)] if LOW_MEMORY else []
     model = keras.Sequential(
         [
             keras.Input(shape=(32, 32, 3)),
+            *preprocessing,
             layers.Conv2D(32, kernel_size=(3, 3), activation="relu"),
             layers.MaxPooling2D(pool_size=(2, 2)),
             layers.Conv2D(64, kernel_size=(3, 3), activation="relu"),
@@ -27,43 +76,312 @@ def load_model():
             layers.Dense(10, activation="softmax"),
         ]
     )
-    model.compile("adam", "sparse_categorical_crossentropy", metrics=["accuracy"])
+    # jit_compile=True compila os passos de treino/avaliação com XLA (no CPU o padrão do Keras é não usar);
+    # steps_per_execution > 1 executa vários batches por chamada, reduzindo o overhead do Python por passo
+    model.compile(
+        "adam",
+        "sparse_categorical_crossentropy",
+        metrics=["accuracy"],
+        jit_compile=jit_compile,
+        steps_per_execution=steps_per_execution,
+    )
+    return model
+
+
+def set_seed(seed):
+    """Fixa as sementes do Python, do NumPy e do TensorFlow."""
+    keras.utils.set_random_seed(seed)
+
+
+# Pool de modelos por processo ➡️ cada ator do Ray constrói e compila o modelo uma vez e o reaproveita em todo client_fn.
+_MODEL_POOL = {}
+_MODEL_BUILD_SECONDS = {}
+MODEL_POOL_STATS = {"builds": 0, "reuses": 0, "saved_seconds": 0.0}
+
+
+def _model_key(jit_compile, steps_per_execution):
+    # Tudo o que muda a arquitetura/compilação do modelo precisa entrar na chave
+    return ("cifar10-cnn", LOW_MEMORY, jit_compile, steps_per_execution)
+
+
+def _optimizer_state_variables(model):
+    # Estado do otimizador = iterações + slots (momentos do Adam); a learning rate é configuração, não estado
+    optimizer = model.optimizer
+    if not optimizer.built:
+        optimizer.build(model.trainable_variables)
+    learning_rate = optimizer.learning_rate
+    return [variable for variable in optimizer.variables if variable is not learning_rate]
+
+
+def _reset_optimizer(model):
+    """Zera o estado do otimizador (iterações e momentos do Adam), mantendo a learning rate."""
+    for variable in _optimizer_state_variables(model):
+        variable.assign(keras.ops.zeros_like(variable))
+
+
+def get_optimizer_state(model):
+    """Copia o estado do otimizador para uma lista de arrays NumPy."""
+    return [keras.ops.convert_to_numpy(variable) for variable in _optimizer_state_variables(model)]
+
+
+def set_optimizer_state(model, arrays):
+    """Restaura o estado do otimizador salvo com get_optimizer_state."""
+    variables = _optimizer_state_variables(model)
+    if len(variables) != len(arrays):
+        raise ValueError(
+            f"Estado do otimizador incompatível: {len(arrays)} arrays para {len(variables)} variáveis"
+        )
+    for variable, array in zip(variables, arrays):
+        variable.assign(array)
+
+
+def get_model(jit_compile=False, steps_per_execution=1):
+    """Devolve um modelo já construído e compilado, reaproveitado entre clientes do mesmo processo.
+
+    O cliente só troca os pesos (set_weights); o estado do otimizador é zerado a cada entrega para que
+    um cliente não herde os momentos do anterior. MODEL_POOL_STATS["saved_seconds"] soma o tempo de
+    construção + compilação evitado (o retracing do train_function também é evitado, mas não é contado).
+    """
+    key = _model_key(jit_compile, steps_per_execution)
+    model = _MODEL_POOL.get(key)
+    if model is None:
+        start = time.perf_counter()
+        model = load_model(jit_compile, steps_per_execution)
+        _MODEL_BUILD_SECONDS[key] = time.perf_counter() - start
+        _MODEL_POOL[key] = model
+        MODEL_POOL_STATS["builds"] += 1
+    else:
+        _reset_optimizer(model)
+        MODEL_POOL_STATS["reuses"] += 1
+        MODEL_POOL_STATS["saved_seconds"] += _MODEL_BUILD_SECONDS[key]
     return model
 
 
 # Controlo aqui
-USE_NON_IID = True  # True para non-IID, False para IID
+USE_NON_IID = True  # True para non-IID (Dirichlet por rótulo, ver partitioner.py), False para IID
 CONCENTRATION = 0.5  # Quanto menor, mais não-iid (0.1 = bem enviesado)
+LOW_MEMORY = True  # True mantém as imagens em uint8 (8x menos memória que float64); False entrega float32 já normalizado
+DATASET = "uoft-cs/cifar10"
+PARTITION_SEED = 42
+TEST_SIZE = 0.2  # Fração de cada partição reservada para avaliação local
 
+# Cache em disco das partições ➡️ cada cliente lê seus arrays .npy via mmap em vez de refazer a conversão Arrow/NumPy.
+PARTITION_CACHE_DIR = os.environ.get(
+    "JEFFERSONMATHEUS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "jeffersonmatheus", "partitions"),
+)
+_DONE_MARKER = "COMPLETO"
+_STREAM_CHUNK = 1024  # Exemplos lidos do mmap por vez no pipeline tf.data
 
-fds = None  # Cache FederatedDataset ➡️ Serve para não baixar o dataset toda vez que um cliente chamar load_data().
 
+MIN_PARTITION_SIZE = 10  # Exemplos garantidos para cada cliente no particionamento non-IID
 
-# Essa função é chamada para cada cliente da simulação, e devolve os dados locais para ele.
-def load_data(partition_id, num_partitions):
+
+fds = None  # Cache FederatedDataset ➡️ Serve para não baixar o dataset toda vez que o cache de partições for construído.
+
+
+def _load_train_split():
     global fds
     if fds is None:
+        # O particionamento é feito pelo partitioner.py; aqui só precisamos do split de treino completo
+        fds = FederatedDataset(
+            dataset=DATASET,
+            partitioners={"train": IidPartitioner(num_partitions=1)},
+        )
+    split = fds.load_split("train").with_format("numpy")
+    return split["img"].astype(np.uint8), split["label"]
+
+
+def _load_test_split():
+    _load_train_split()  # garante o FederatedDataset
+    split = fds.load_split("test").with_format("numpy")
+    return split["img"].astype(np.uint8), split["label"]
+
+
+_TEST_SET = None  # Split de teste centralizado já carregado neste processo
+
+
+def load_test_data():
+    """Split de teste completo do CIFAR-10, para a avaliação centralizada no servidor.
+
+    Fica em cache em disco (uint8, como as partições) e na memória do processo depois da primeira
+    chamada. Com LOW_MEMORY as imagens ficam em uint8 (o modelo normaliza); senão vêm em float32.
+    """
+    global _TEST_SET
+    if _TEST_SET is not None:
+        return _TEST_SET
+
+    path = os.path.join(PARTITION_CACHE_DIR, f"{DATASET.replace('/', '--')}_test_uint8")
+    if not os.path.exists(os.path.join(path, _DONE_MARKER)):
+        os.makedirs(PARTITION_CACHE_DIR, exist_ok=True)
+        with open(path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not os.path.exists(os.path.join(path, _DONE_MARKER)):
+                images, labels = _load_test_split()
+                tmp_path = path + ".tmp"
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                os.makedirs(tmp_path)
+                np.save(os.path.join(tmp_path, "x.npy"), images)
+                np.save(os.path.join(tmp_path, "y.npy"), labels)
+                open(os.path.join(tmp_path, _DONE_MARKER), "w").close()
+                shutil.rmtree(path, ignore_errors=True)
+                os.rename(tmp_path, path)
+
+    x = np.load(os.path.join(path, "x.npy"))
+    y = np.load(os.path.join(path, "y.npy"))
+    if not LOW_MEMORY:
+        x = x.astype(np.float32) / 255.0
+    _TEST_SET = (x, y)
+    return _TEST_SET
+
+
+def partition_cache_path(num_partitions):
+    """Diretório do cache para a configuração de particionamento atual."""
+    if USE_NON_IID:
+        partitioner = f"dirichlet-a{CONCENTRATION}-m{MIN_PARTITION_SIZE}"
+    else:
+        partitioner = "iid"
+    key = (
+        f"{DATASET.replace('/', '--')}_{partitioner}_n{num_partitions}"
+        f"_s{PARTITION_SEED}_t{TEST_SIZE}_uint8"
+    )
+    return os.path.join(PARTITION_CACHE_DIR, key)
+
+
+def split_indices(num_examples, partition_id):
+    """Divisão treino/teste determinística de uma partição (mesma semente => mesmos índices)."""
+    rng = np.random.default_rng([PARTITION_SEED, partition_id])
+    permutation = rng.permutation(num_examples).astype(np.int32)
+    num_test = int(np.ceil(num_examples * TEST_SIZE))
+    return np.sort(permutation[num_test:]), np.sort(permutation[:num_test])
+
+
+def build_partitions(num_partitions):
+    """Grava as partições de todos os clientes em disco (executado uma única vez).
+
+    As imagens são gravadas em uint8, exatamente como vêm do dataset; a normalização fica para
+    o modelo (LOW_MEMORY) ou para o load_data.
+
+    Todos os clientes ficam num único x.npy/y.npy, um bloco contíguo por cliente (offsets.npy),
+    cada bloco na ordem treino + teste (num_train.npy). Assim carregar uma partição é só um slice
+    do mmap, e o cache continua com poucos arquivos mesmo com milhares de clientes. indices.npy
+    guarda o índice original no dataset de cada linha, ou seja, os índices de treino/teste de
+    cada cliente.
+
+    A divisão treino/teste é feita uma única vez, com semente.
+
+    Vários supernodes podem chamar esta função ao mesmo tempo: um lock de arquivo garante
+    que apenas um deles constrói o cache enquanto os outros esperam e depois só o reutilizam.
+    """
+    path = partition_cache_path(num_partitions)
+    if os.path.exists(os.path.join(path, _DONE_MARKER)):
+        return path
+
+    os.makedirs(PARTITION_CACHE_DIR, exist_ok=True)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(os.path.join(path, _DONE_MARKER)):
+            return path
+
+        images, labels = _load_train_split()
         if USE_NON_IID:
-            partitioner = DirichletPartitioner(
-                partition_by="label",
-                num_partitions=num_partitions,
-                alpha=0.5,
-                seed=42,
+            # Com muitos clientes o mínimo é reduzido para que sobrem exemplos para o sorteio Dirichlet
+            min_partition_size = min(MIN_PARTITION_SIZE, len(labels) // (2 * num_partitions))
+            partitions = dirichlet_partition(
+                labels,
+                num_partitions,
+                alpha=CONCENTRATION,
+                seed=PARTITION_SEED,
+                min_partition_size=min_partition_size,
             )
         else:
-            partitioner = IidPartitioner(num_partitions=num_partitions)
+            partitions = iid_partition(len(labels), num_partitions, seed=PARTITION_SEED)
 
-        fds = FederatedDataset(
-            dataset="uoft-cs/cifar10",
-            partitioners={"train": partitioner},
-        )
+        rows = []
+        num_train = np.empty(num_partitions, dtype=np.int32)
+        for partition_id, partition in enumerate(partitions):
+            train_idx, test_idx = split_indices(len(partition), partition_id)
+            rows += [partition[train_idx], partition[test_idx]]
+            num_train[partition_id] = len(train_idx)
+        indices = np.concatenate(rows)
+        offsets = np.concatenate([[0], np.cumsum([len(p) for p in partitions])])
+
+        # Escreve num diretório temporário e só publica no final, para nunca expor um cache incompleto
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        arrays = {
+            "x": images[indices],
+            "y": labels[indices],
+            "indices": indices,
+            "offsets": offsets,
+            "num_train": num_train,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
 
-    partition = fds.load_partition(partition_id, "train")
-    partition.set_format("numpy")
+        open(os.path.join(tmp_path, _DONE_MARKER), "w").close()
+        shutil.rmtree(path, ignore_errors=True)
+        os.rename(tmp_path, path)
+    return path
 
-    split = partition.train_test_split(test_size=0.2)
-    x_train, y_train = split["train"]["img"] / 255.0, split["train"]["label"]
-    x_test, y_test = split["test"]["img"] / 255.0, split["test"]["label"]
+
+# Essa função é chamada para cada cliente da simulação, e devolve os dados locais para ele.
+def load_data(partition_id, num_partitions):
+    path = build_partitions(num_partitions)
+
+    # mmap_mode="r" ➡️ os arrays não são copiados para a memória do processo; todos os atores compartilham o page cache.
+    def _open(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+    x, y = _open("x"), _open("y")
+    start, end = _open("offsets")[partition_id : partition_id + 2]
+    middle = start + _open("num_train")[partition_id]
+    x_train, y_train = x[start:middle], y[start:middle]
+    x_test, y_test = x[middle:end], y[middle:end]
+    if not LOW_MEMORY:
+        x_train = x_train.astype(np.float32) / 255.0
+        x_test = x_test.astype(np.float32) / 255.0
     return x_train, y_train, x_test, y_test
 
 
+def make_dataset(x, y, batch_size, shuffle=False, seed=None):
+    """Monta um pipeline tf.data sobre os arrays da partição (inclusive os mmap do cache).
+
+    Os dados são lidos do disco em blocos contíguos, guardados com cache() na primeira época,
+    embaralhados (opcional), agrupados em batches e pré-carregados com prefetch(AUTOTUNE)
+    para sobrepor o preparo da entrada com o treino.
+    """
+    num_examples = len(x)
+
+    def _read_chunk(start):
+        end = min(start + _STREAM_CHUNK, num_examples)
+        return np.asarray(x[start:end]), np.asarray(y[start:end])
+
+    dataset = tf.data.Dataset.range(0, num_examples, _STREAM_CHUNK)
+    dataset = dataset.map(
+        lambda start: tf.numpy_function(
+            _read_chunk, [start], (tf.as_dtype(x.dtype), tf.as_dtype(y.dtype))
+        )
+    )
+    dataset = dataset.map(
+        lambda x_chunk, y_chunk: (
+            tf.ensure_shape(x_chunk, (None, *x.shape[1:])),
+            tf.ensure_shape(y_chunk, (None,)),
+        )
+    )
+    # unbatch() perde a cardinalidade; informá-la evita que o Keras trate o fim da época como dados faltando
+    dataset = dataset.unbatch().apply(tf.data.experimental.assert_cardinality(num_examples))
+    dataset = dataset.cache()
+    if shuffle:
+        dataset = dataset.shuffle(num_examples, seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Constrói o cache de partições em disco.")
+    parser.add_argument("--num-partitions", type=int, default=10)
+    args = parser.parse_args()
+    print(f"Cache de partições em: {build_partitions(args.num_partitions)}")
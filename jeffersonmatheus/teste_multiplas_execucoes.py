@@ -2,143 +2,107 @@
 
 import matplotlib.pyplot as plt
 import numpy as np
-import subprocess
 import json
+import math
 import os
-import re
 from typing import Dict, List, Tuple
 import statistics
 from datetime import datetime
 
-def get_file_paths():
-    """Detecta automaticamente os caminhos corretos dos arquivos."""
-    if os.path.exists("pyproject.toml"):
-        server_app_path = "jeffersonmatheus/server_app.py"
-        pyproject_path = "pyproject.toml"
-    elif os.path.exists("jeffersonmatheus/pyproject.toml"):
-        server_app_path = "jeffersonmatheus/jeffersonmatheus/server_app.py"
-        pyproject_path = "jeffersonmatheus/pyproject.toml"
-    else:
-        raise FileNotFoundError("Não foi possível encontrar os arquivos necessários.")
-    
-    return server_app_path, pyproject_path
+from jeffersonmatheus.result_store import ResultStore
+from jeffersonmatheus.schedule import measured
+from jeffersonmatheus.sweep import expand_grid, run_sweep, sweep_executor
 
-def modify_server_config(clients_per_round: int, num_rounds: int = 10):
-    """Modifica a configuração do servidor para usar diferentes quantidades de clientes."""
-    server_app_path, pyproject_path = get_file_paths()
-    
-    with open(server_app_path, "r") as f:
-        content = f.read()
-    
-    # Atualiza o número de clientes por rodada
-    content = re.sub(
-        r'clients_per_round = \d+',
-        f'clients_per_round = {clients_per_round}',
-        content
-    )
-    
-    # Atualiza o fraction_fit baseado no número de clientes
-    fraction_fit = clients_per_round / 10.0
-    content = re.sub(
-        r'fraction_fit=0\.\d+',
-        f'fraction_fit={fraction_fit}',
-        content
-    )
-    
-    with open(server_app_path, "w") as f:
-        f.write(content)
-    
-    # Atualiza o pyproject.toml para o número de rodadas
-    with open(pyproject_path, "r") as f:
-        pyproject_content = f.read()
-    
-    pyproject_content = re.sub(
-        r'num-server-rounds = \d+',
-        f'num-server-rounds = {num_rounds}',
-        pyproject_content
-    )
-    
-    with open(pyproject_path, "w") as f:
-        f.write(pyproject_content)
+STRATEGY_KEYS = {"FedAvg": "fedavg", "Performance-Based": "performance"}  # run config `strategy`
+CPUS_PER_EXPERIMENT = 2  # CPUs (Ray + TensorFlow) de cada experimento em paralelo
+MAX_CONCURRENT = None  # experimentos ao mesmo tempo; None = quantos couberem nos CPUs da máquina
+RESULT_STORE_DIR = "resultados_cache"  # curvas já calculadas (por hash da configuração); None desliga
+# Modo adaptativo: teste sequencial (SPRT de Wald) sobre os pares de execuções com a mesma semente
+SPRT_ALPHA = 0.05  # chance de declarar que a Performance-Based vence quando ela não vence
+SPRT_BETA = 0.20  # chance de não declarar quando ela vence em SPRT_P1 dos pares
+SPRT_P1 = 0.8  # H1: a Performance-Based vence 80% dos pares (H0: 50%, nenhuma vantagem)
 
-def run_experiment(strategy_name: str, clients_per_round: int, num_rounds: int = 10, execution_id: int = 1) -> List[float]:
-    """Executa o experimento com uma estratégia específica e retorna os resultados."""
-    print(f"  Execução {execution_id}: {strategy_name} com {clients_per_round} clientes por rodada...")
-    
-    server_app_path, _ = get_file_paths()
-    
-    # Configura a estratégia no arquivo server_app.py
-    with open(server_app_path, "r") as f:
-        content = f.read()
-    
-    if strategy_name == "FedAvg":
-        new_content = content.replace("USE_PERFORMANCE_BASED = True", "USE_PERFORMANCE_BASED = False")
-    else:  # Performance-Based
-        new_content = content.replace("USE_PERFORMANCE_BASED = False", "USE_PERFORMANCE_BASED = True")
-    
-    with open(server_app_path, "w") as f:
-        f.write(new_content)
-    
-    # Executa o experimento
-    result_file = f"results_{strategy_name.lower().replace('-', '_')}_{clients_per_round}clients_exec_{execution_id}.txt"
-    with open(result_file, "w") as f:
-        subprocess.run(["flwr", "run"], stdout=f, stderr=f)
-    
-    # Extrai as métricas do arquivo de resultado
-    accuracies = []
-    with open(result_file, "r") as f:
-        content = f.read()
-        
-    # Procura pela seção de métricas no final do arquivo
-    if "'accuracy': [" in content:
-        start_marker = "'accuracy': ["
-        end_marker = "]}"
-        
-        start_idx = content.find(start_marker)
-        if start_idx != -1:
-            start_idx += len(start_marker)
-            end_idx = content.find(end_marker, start_idx)
-            
-            if end_idx != -1:
-                metrics_section = content[start_idx:end_idx]
-                
-                # Extrai os pares (round, accuracy) usando regex mais robusto
-                pattern = r'\((\d+),\s*([\d.]+)\)'
-                matches = re.findall(pattern, metrics_section)
-                
-                # Ordena por número da rodada e extrai apenas as accuracies
-                matches.sort(key=lambda x: int(x[0]))
-                accuracies = [float(match[1]) for match in matches]
-                
-                print(f"    Extraídas {len(accuracies)} rodadas. Final: {accuracies[-1]:.4f}")
-    
-    return accuracies
-
-def run_multiple_executions(clients_per_round: int, num_rounds: int, num_executions: int = 10):
+def run_multiple_executions(clients_per_round: int, num_rounds: int, num_executions: int = 10,
+                            first_execution: int = 1, executor=None):
     """Executa múltiplas vezes o mesmo teste e retorna estatísticas."""
     print(f"\n=== EXECUTANDO {num_executions} VEZES ===")
     print(f"Configuração: {clients_per_round} clientes por rodada, {num_rounds} rodadas")
     
-    # Modifica configuração do servidor
-    modify_server_config(clients_per_round, num_rounds)
+    # Todas as execuções das duas estratégias rodam em paralelo; a semente é o número da execução
+    seeds = range(first_execution, first_execution + num_executions)
+    grid = expand_grid(list(STRATEGY_KEYS.values()), [clients_per_round], [num_rounds], seeds)
+    store = ResultStore(RESULT_STORE_DIR) if RESULT_STORE_DIR else None
+    results = run_sweep(grid, CPUS_PER_EXPERIMENT, MAX_CONCURRENT, store=store, executor=executor)
     
-    # Listas para armazenar resultados
-    fedavg_executions = []
-    perf_executions = []
+    # Resultados na ordem da grade: execuções em ordem dentro de cada estratégia
+    executions = {strategy: [] for strategy in STRATEGY_KEYS.values()}
+    for result in results:
+        executions[result["strategy"]].append(result["accuracies"])
     
-    # Executa múltiplas vezes
-    for execution in range(1, num_executions + 1):
-        print(f"\n--- Execução {execution}/{num_executions} ---")
-        
-        # Executa FedAvg
-        fedavg_results = run_experiment("FedAvg", clients_per_round, num_rounds, execution)
-        fedavg_executions.append(fedavg_results)
-        
-        # Executa Performance-Based
-        perf_results = run_experiment("Performance-Based", clients_per_round, num_rounds, execution)
-        perf_executions.append(perf_results)
-    
-    return fedavg_executions, perf_executions
+    return executions["fedavg"], executions["performance"]
+
+def sprt_bounds(alpha: float = SPRT_ALPHA, beta: float = SPRT_BETA):
+    """Limites (inferior, superior) do log da razão de verossimilhança no SPRT de Wald."""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+def sprt_decision(fedavg_finals: List[float], perf_finals: List[float], p1: float = SPRT_P1):
+    """SPRT de Wald sobre os pares (mesma semente) de acurácias finais, na ordem das execuções.
+
+    Cada par é uma vitória ou derrota da Performance-Based (empates não contam). H0: ela vence
+    metade dos pares; H1: vence uma fração p1. Retorna (decisão, LLR, pares usados), com decisão
+    "H1" (a Performance-Based vence), "H0" (sem vantagem) ou None (ainda indefinido).
+    """
+    lower, upper = sprt_bounds()
+    llr = 0.0
+    for used, (fedavg_final, perf_final) in enumerate(zip(fedavg_finals, perf_finals), 1):
+        if perf_final > fedavg_final:
+            llr += math.log(p1 / 0.5)
+        elif perf_final < fedavg_final:
+            llr += math.log((1 - p1) / 0.5)
+        if llr >= upper:
+            return "H1", llr, used
+        if llr <= lower:
+            return "H0", llr, used
+    return None, llr, len(fedavg_finals)
+
+def run_adaptive_executions(clients_per_round: int, num_rounds: int, max_executions: int = 10):
+    """Executa pares de execuções até o SPRT decidir ou até max_executions pares.
+
+    Cada passo roda em paralelo os pares que cabem nos CPUs (seguindo CPUS_PER_EXPERIMENT e
+    MAX_CONCURRENT), sempre no mesmo pool de processos: o TensorFlow e o Ray de cada processo
+    continuam aquecidos de um passo para o outro. Os pares rodados além do ponto de decisão ficam
+    no cache de resultados, mas não entram na análise.
+    """
+    concurrent = MAX_CONCURRENT or max(1, (os.cpu_count() or 1) // CPUS_PER_EXPERIMENT)
+    concurrent = min(concurrent, len(STRATEGY_KEYS) * max_executions)
+    pairs_per_step = max(1, concurrent // len(STRATEGY_KEYS))
+    lower, upper = sprt_bounds()
+    fedavg_executions, perf_executions = [], []
+    decision, used = None, 0
+    with sweep_executor(CPUS_PER_EXPERIMENT, concurrent) as executor:
+        while decision is None and len(fedavg_executions) < max_executions:
+            step = min(pairs_per_step, max_executions - len(fedavg_executions))
+            fedavg_step, perf_step = run_multiple_executions(
+                clients_per_round, num_rounds, step,
+                first_execution=len(fedavg_executions) + 1, executor=executor,
+            )
+            fedavg_executions += fedavg_step
+            perf_executions += perf_step
+            decision, llr, used = sprt_decision(
+                [execution[-1] for execution in fedavg_executions],
+                [execution[-1] for execution in perf_executions],
+            )
+            print(f"  SPRT após {len(fedavg_executions)} pares: LLR = {llr:+.2f} "
+                  f"(limites {lower:.2f} e {upper:.2f})")
+    return fedavg_executions[:used], perf_executions[:used], decision
+
+def round_values(executions, round_idx):
+    """Acurácias medidas na rodada; execuções que não avaliaram nela (NaN, eval-every > 1) ficam de fora."""
+    return [
+        execution[round_idx]
+        for execution in executions
+        if len(execution) > round_idx and not math.isnan(execution[round_idx])
+    ]
 
 def calculate_statistics(executions: List[List[float]], strategy_name: str):
     """Calcula estatísticas dos resultados de múltiplas execuções."""
@@ -156,7 +120,7 @@ def calculate_statistics(executions: List[List[float]], strategy_name: str):
     
     # Estatísticas por rodada
     for round_idx in range(num_rounds):
-        round_accuracies = [execution[round_idx] for execution in executions if len(execution) > round_idx]
+        round_accuracies = round_values(executions, round_idx)
         
         if round_accuracies:
             round_stat = {
@@ -184,8 +148,6 @@ def plot_multiple_executions(fedavg_executions, perf_executions, clients_per_rou
     """Plota os resultados de múltiplas execuções."""
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
     
-    rounds = range(1, num_rounds + 1)
-    
     # Gráfico 1: Todas as execuções
     ax1.set_title(f'Todas as {num_executions} Execuções ({clients_per_round} clientes, {num_rounds} rodadas)', fontsize=14)
     ax1.set_xlabel('Rounds')
@@ -195,13 +157,13 @@ def plot_multiple_executions(fedavg_executions, perf_executions, clients_per_rou
     for i, execution in enumerate(fedavg_executions):
         if len(execution) == num_rounds:
             alpha = 0.3 if i < len(fedavg_executions) - 1 else 0.8
-            ax1.plot(rounds, execution, 'b-', alpha=alpha, linewidth=1)
+            ax1.plot(*measured(execution), 'b-', alpha=alpha, linewidth=1)
     
     # Plota cada execução do Performance-Based
     for i, execution in enumerate(perf_executions):
         if len(execution) == num_rounds:
             alpha = 0.3 if i < len(perf_executions) - 1 else 0.8
-            ax1.plot(rounds, execution, 'r-', alpha=alpha, linewidth=1)
+            ax1.plot(*measured(execution), 'r-', alpha=alpha, linewidth=1)
     
     # Adiciona legendas
     ax1.plot([], [], 'b-', label='FedAvg', linewidth=2)
@@ -215,30 +177,35 @@ def plot_multiple_executions(fedavg_executions, perf_executions, clients_per_rou
     ax2.set_ylabel('Accuracy')
     
     # Calcula médias e desvios padrão por rodada
+    # Só as rodadas com alguma avaliação medida
+    fedavg_rounds = []
     fedavg_means = []
     fedavg_stds = []
+    perf_rounds = []
     perf_means = []
     perf_stds = []
     
     for round_idx in range(num_rounds):
-        fedavg_round_values = [execution[round_idx] for execution in fedavg_executions if len(execution) > round_idx]
-        perf_round_values = [execution[round_idx] for execution in perf_executions if len(execution) > round_idx]
+        fedavg_round_values = round_values(fedavg_executions, round_idx)
+        perf_round_values = round_values(perf_executions, round_idx)
         
         if fedavg_round_values:
+            fedavg_rounds.append(round_idx + 1)
             fedavg_means.append(statistics.mean(fedavg_round_values))
             fedavg_stds.append(statistics.stdev(fedavg_round_values) if len(fedavg_round_values) > 1 else 0)
         
         if perf_round_values:
+            perf_rounds.append(round_idx + 1)
             perf_means.append(statistics.mean(perf_round_values))
             perf_stds.append(statistics.stdev(perf_round_values) if len(perf_round_values) > 1 else 0)
     
     # Plota médias com barras de erro
     if fedavg_means:
-        ax2.errorbar(rounds[:len(fedavg_means)], fedavg_means, yerr=fedavg_stds, 
+        ax2.errorbar(fedavg_rounds, fedavg_means, yerr=fedavg_stds, 
                     fmt='b-o', label='FedAvg', capsize=5, capthick=2)
     
     if perf_means:
-        ax2.errorbar(rounds[:len(perf_means)], perf_means, yerr=perf_stds, 
+        ax2.errorbar(perf_rounds, perf_means, yerr=perf_stds, 
                     fmt='r-s', label='Performance-Based', capsize=5, capthick=2)
     
     ax2.legend()
@@ -290,7 +257,11 @@ def main():
     # Configurações
     clients_per_round = int(input("Digite o número de clientes por rodada (2, 4, 6, 8): "))
     num_rounds = int(input("Digite o número de rodadas (10, 20, 30): "))
-    num_executions = int(input("Digite o número de execuções (recomendado: 10): "))
+    adaptive = input("Parar quando o teste sequencial (SPRT) decidir? (s/n): ").strip().lower() == "s"
+    if adaptive:
+        num_executions = int(input("Digite o número máximo de execuções (recomendado: 10): "))
+    else:
+        num_executions = int(input("Digite o número de execuções (recomendado: 10): "))
     
     if clients_per_round not in [2, 4, 6, 8]:
         print("Erro: Número de clientes deve ser 2, 4, 6 ou 8")
@@ -305,9 +276,19 @@ def main():
         return
     
     # Executa múltiplas vezes
-    fedavg_executions, perf_executions = run_multiple_executions(
-        clients_per_round, num_rounds, num_executions
-    )
+    decision = None
+    if adaptive:
+        fedavg_executions, perf_executions, decision = run_adaptive_executions(
+            clients_per_round, num_rounds, num_executions
+        )
+        num_executions = len(fedavg_executions)
+        print({"H1": f"\n✅ SPRT: Performance-Based vence FedAvg ({num_executions} pares)",
+               "H0": f"\n❌ SPRT: sem vantagem da Performance-Based ({num_executions} pares)",
+               None: f"\n⚠️ SPRT indefinido após o limite de {num_executions} pares"}[decision])
+    else:
+        fedavg_executions, perf_executions = run_multiple_executions(
+            clients_per_round, num_rounds, num_executions
+        )
     
     # Calcula estatísticas
     fedavg_stats = calculate_statistics(fedavg_executions, "FedAvg")
@@ -329,6 +310,13 @@ def main():
             'num_executions': num_executions,
             'timestamp': timestamp
         },
+        'sequential_test': {
+            'adaptive': adaptive,
+            'decision': decision,
+            'alpha': SPRT_ALPHA,
+            'beta': SPRT_BETA,
+            'p1': SPRT_P1
+        },
         'fedavg': {
             'executions': fedavg_executions,
             'statistics': fedavg_stats
@@ -2,123 +2,57 @@
 
 import matplotlib.pyplot as plt
 import numpy as np
-import subprocess
 import json
-import os
-import re
+import math
 import statistics
 from datetime import datetime
 from typing import List
 
-def get_file_paths():
-    """Detecta automaticamente os caminhos corretos dos arquivos."""
-    if os.path.exists("pyproject.toml"):
-        server_app_path = "jeffersonmatheus/server_app.py"
-        pyproject_path = "pyproject.toml"
-    elif os.path.exists("jeffersonmatheus/pyproject.toml"):
-        server_app_path = "jeffersonmatheus/jeffersonmatheus/server_app.py"
-        pyproject_path = "jeffersonmatheus/pyproject.toml"
-    else:
-        raise FileNotFoundError("Não foi possível encontrar os arquivos necessários.")
-    
-    return server_app_path, pyproject_path
-
-def modify_server_config(clients_per_round: int, num_rounds: int = 10):
-    """Modifica a configuração do servidor."""
-    server_app_path, pyproject_path = get_file_paths()
-    
-    with open(server_app_path, "r") as f:
-        content = f.read()
-    
-    content = re.sub(r'clients_per_round = \d+', f'clients_per_round = {clients_per_round}', content)
-    fraction_fit = clients_per_round / 10.0
-    content = re.sub(r'fraction_fit=0\.\d+', f'fraction_fit={fraction_fit}', content)
-    
-    with open(server_app_path, "w") as f:
-        f.write(content)
-    
-    with open(pyproject_path, "r") as f:
-        pyproject_content = f.read()
-    
-    pyproject_content = re.sub(r'num-server-rounds = \d+', f'num-server-rounds = {num_rounds}', pyproject_content)
-    
-    with open(pyproject_path, "w") as f:
-        f.write(pyproject_content)
+from jeffersonmatheus.result_store import ResultStore
+from jeffersonmatheus.schedule import measured
+from jeffersonmatheus.sweep import expand_grid, run_sweep
 
-def run_experiment(strategy_name: str, clients_per_round: int, num_rounds: int, execution_id: int) -> List[float]:
-    """Executa um experimento e retorna as accuracies."""
-    print(f"  Exec {execution_id}: {strategy_name}")
-    
-    server_app_path, _ = get_file_paths()
-    
-    with open(server_app_path, "r") as f:
-        content = f.read()
-    
-    if strategy_name == "FedAvg":
-        new_content = content.replace("USE_PERFORMANCE_BASED = True", "USE_PERFORMANCE_BASED = False")
-    else:
-        new_content = content.replace("USE_PERFORMANCE_BASED = False", "USE_PERFORMANCE_BASED = True")
-    
-    with open(server_app_path, "w") as f:
-        f.write(new_content)
-    
-    result_file = f"results_{strategy_name.lower().replace('-', '_')}_{clients_per_round}clients_exec_{execution_id}.txt"
-    with open(result_file, "w") as f:
-        subprocess.run(["flwr", "run"], stdout=f, stderr=f)
-    
-    accuracies = []
-    with open(result_file, "r") as f:
-        content = f.read()
-        
-    if "'accuracy': [" in content:
-        start_marker = "'accuracy': ["
-        end_marker = "]}"
-        
-        start_idx = content.find(start_marker)
-        if start_idx != -1:
-            start_idx += len(start_marker)
-            end_idx = content.find(end_marker, start_idx)
-            
-            if end_idx != -1:
-                metrics_section = content[start_idx:end_idx]
-                pattern = r'\((\d+),\s*([\d.]+)\)'
-                matches = re.findall(pattern, metrics_section)
-                matches.sort(key=lambda x: int(x[0]))
-                accuracies = [float(match[1]) for match in matches]
-    
-    return accuracies
+STRATEGY_KEYS = {"FedAvg": "fedavg", "Performance-Based": "performance"}  # run config `strategy`
+CPUS_PER_EXPERIMENT = 2  # CPUs (Ray + TensorFlow) de cada experimento em paralelo
+MAX_CONCURRENT = None  # experimentos ao mesmo tempo; None = quantos couberem nos CPUs da máquina
+RESULT_STORE_DIR = "resultados_cache"  # curvas já calculadas (por hash da configuração); None desliga
 
 def run_quick_test(clients_per_round: int = 4, num_rounds: int = 10, num_executions: int = 5):
     """Executa um teste rápido com configurações pré-definidas."""
     print(f"\n=== TESTE RÁPIDO: {num_executions} execuções ===")
     print(f"Config: {clients_per_round} clientes, {num_rounds} rodadas")
     
-    modify_server_config(clients_per_round, num_rounds)
+    # Execuções em paralelo; a semente é o número da execução
+    grid = expand_grid(
+        list(STRATEGY_KEYS.values()), [clients_per_round], [num_rounds], range(1, num_executions + 1)
+    )
+    store = ResultStore(RESULT_STORE_DIR) if RESULT_STORE_DIR else None
+    results = run_sweep(grid, CPUS_PER_EXPERIMENT, MAX_CONCURRENT, store=store)
     
-    fedavg_results = []
-    perf_results = []
+    executions = {strategy: [] for strategy in STRATEGY_KEYS.values()}
+    for result in results:
+        executions[result["strategy"]].append(result["accuracies"])
+    fedavg_results, perf_results = executions["fedavg"], executions["performance"]
     
-    for exec_id in range(1, num_executions + 1):
-        print(f"\n--- Execução {exec_id}/{num_executions} ---")
-        
-        fedavg_acc = run_experiment("FedAvg", clients_per_round, num_rounds, exec_id)
-        fedavg_results.append(fedavg_acc)
-        
-        perf_acc = run_experiment("Performance-Based", clients_per_round, num_rounds, exec_id)
-        perf_results.append(perf_acc)
-        
+    for exec_id, (fedavg_acc, perf_acc) in enumerate(zip(fedavg_results, perf_results), 1):
         if fedavg_acc and perf_acc:
             diff = ((perf_acc[-1] - fedavg_acc[-1]) / fedavg_acc[-1] * 100)
-            print(f"    FedAvg: {fedavg_acc[-1]:.4f}, Perf: {perf_acc[-1]:.4f}, Diff: {diff:+.2f}%")
+            print(f"    Execução {exec_id}: FedAvg: {fedavg_acc[-1]:.4f}, Perf: {perf_acc[-1]:.4f}, Diff: {diff:+.2f}%")
     
     return fedavg_results, perf_results
 
+def round_values(executions, round_idx):
+    """Acurácias medidas na rodada; execuções que não avaliaram nela (NaN, eval-every > 1) ficam de fora."""
+    return [
+        execution[round_idx]
+        for execution in executions
+        if len(execution) > round_idx and not math.isnan(execution[round_idx])
+    ]
+
 def plot_quick_results(fedavg_results, perf_results, clients_per_round, num_rounds, num_executions):
     """Plota resultados do teste rápido."""
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
     
-    rounds = range(1, num_rounds + 1)
-    
     # Gráfico 1: Todas as execuções
     ax1.set_title(f'Teste Rápido: {num_executions} execuções', fontsize=14)
     ax1.set_xlabel('Rounds')
@@ -127,12 +61,12 @@ def plot_quick_results(fedavg_results, perf_results, clients_per_round, num_roun
     for i, execution in enumerate(fedavg_results):
         if len(execution) == num_rounds:
             alpha = 0.4
-            ax1.plot(rounds, execution, 'b-', alpha=alpha, linewidth=1)
+            ax1.plot(*measured(execution), 'b-', alpha=alpha, linewidth=1)
     
     for i, execution in enumerate(perf_results):
         if len(execution) == num_rounds:
             alpha = 0.4
-            ax1.plot(rounds, execution, 'r-', alpha=alpha, linewidth=1)
+            ax1.plot(*measured(execution), 'r-', alpha=alpha, linewidth=1)
     
     ax1.plot([], [], 'b-', label='FedAvg', linewidth=2)
     ax1.plot([], [], 'r-', label='Performance-Based', linewidth=2)
@@ -144,24 +78,27 @@ def plot_quick_results(fedavg_results, perf_results, clients_per_round, num_roun
     ax2.set_xlabel('Rounds')
     ax2.set_ylabel('Accuracy')
     
-    fedavg_means = []
-    perf_means = []
+    # Só as rodadas com alguma avaliação medida
+    fedavg_rounds, fedavg_means = [], []
+    perf_rounds, perf_means = [], []
     
     for round_idx in range(num_rounds):
-        fedavg_round_values = [execution[round_idx] for execution in fedavg_results if len(execution) > round_idx]
-        perf_round_values = [execution[round_idx] for execution in perf_results if len(execution) > round_idx]
+        fedavg_round_values = round_values(fedavg_results, round_idx)
+        perf_round_values = round_values(perf_results, round_idx)
         
         if fedavg_round_values:
+            fedavg_rounds.append(round_idx + 1)
             fedavg_means.append(statistics.mean(fedavg_round_values))
         
         if perf_round_values:
+            perf_rounds.append(round_idx + 1)
             perf_means.append(statistics.mean(perf_round_values))
     
     if fedavg_means:
-        ax2.plot(rounds[:len(fedavg_means)], fedavg_means, 'b-o', label='FedAvg', linewidth=2)
+        ax2.plot(fedavg_rounds, fedavg_means, 'b-o', label='FedAvg', linewidth=2)
     
     if perf_means:
-        ax2.plot(rounds[:len(perf_means)], perf_means, 'r-s', label='Performance-Based', linewidth=2)
+        ax2.plot(perf_rounds, perf_means, 'r-s', label='Performance-Based', linewidth=2)
     
     ax2.legend()
     ax2.grid(True, alpha=0.3)